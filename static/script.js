@@ -28,7 +28,8 @@
         cleanupBtn: document.getElementById('cleanup'),
         clearhistoryBtn: document.getElementById('clearhistory'),
         prevPrints: document.getElementById('prevprints'),
-        timeSavedLabel: document.getElementById('time_saved')
+        timeSavedLabel: document.getElementById('time_saved'),
+        preview: document.getElementById('preview')
     };
 
     // -----------------------------
@@ -36,10 +37,12 @@
     // -----------------------------
     const STORAGE_KEYS = {
         PRICE_HISTORY: 'priceHistory',
-        SELECTED_PRICE_TYPE: 'selectedPriceType'
+        SELECTED_PRICE_TYPE: 'selectedPriceType',
+        LAST_HISTORY_ID: 'lastHistoryId'
     };
 
     const MAX_HISTORY = 3;
+    const PREVIEW_DELAY_MS = 150;
 
     // -----------------------------
     // UTILITY FUNCTIONS
@@ -48,6 +51,7 @@
         try {
             if (op === 'get') return localStorage.getItem(key);
             if (op === 'set') return localStorage.setItem(key, value);
+            if (op === 'remove') return localStorage.removeItem(key);
         } catch (err) {
             console.warn('LocalStorage Error:', err);
             return null;
@@ -135,6 +139,7 @@
         if (!mode) return;
 
         (mode === 'old' ? elements.oldPrice : elements.newPrice).value = price;
+        schedulePreview();
     }
 
     function handleQtyClick(e) {
@@ -180,10 +185,18 @@
         appendPrintQtyToLocalStorage();
         updateTimeSavedLabel();
 
-        setTimeout(() => e.target.submit(), 50);
+        sendPrint();
     }
 
     function handleReprint() {
+        // Reprint the server's stored label when we know its history ID
+        const historyId = safeLocalStorage('get', STORAGE_KEYS.LAST_HISTORY_ID);
+        if (historyId) {
+            appendPrintQtyToLocalStorage();
+            updateTimeSavedLabel();
+            return sendReprint(historyId);
+        }
+
         const history = JSON.parse(
             safeLocalStorage('get', STORAGE_KEYS.PRICE_HISTORY) || '[]'
         );
@@ -212,7 +225,96 @@
         appendPrintQtyToLocalStorage();
         updateTimeSavedLabel();
 
-        elements.form.submit();
+        sendPrint();
+    }
+
+    // -----------------------------
+    // PRINT API
+    // -----------------------------
+    function sendPrint() {
+        const payload = Object.fromEntries(new FormData(elements.form));
+
+        return fetch('/api/print', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+            body: JSON.stringify(payload)
+        })
+            .then(res => res.json().then(data => {
+                if (!res.ok || !data.success) throw new Error(data.message || `HTTP ${res.status}`);
+                if (data.history_id) safeLocalStorage('set', STORAGE_KEYS.LAST_HISTORY_ID, String(data.history_id));
+                resetAfterPrint();
+                return data;
+            }))
+            .catch(err => {
+                console.warn('Print Error:', err);
+                alert(`Print failed: ${err.message}`);
+            });
+    }
+
+    function sendReprint(historyId) {
+        return fetch(`/api/history/${encodeURIComponent(historyId)}/reprint`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+            body: JSON.stringify({ qty: 1 })
+        })
+            .then(res => res.json().then(data => {
+                if (!res.ok || !data.success) throw new Error(data.message || `HTTP ${res.status}`);
+                return data;
+            }))
+            .catch(err => {
+                console.warn('Reprint Error:', err);
+                alert(`Reprint failed: ${err.message}`);
+            });
+    }
+
+    // -----------------------------
+    // PREVIEW
+    // -----------------------------
+    let previewTimer = null;
+
+    function schedulePreview() {
+        clearTimeout(previewTimer);
+        previewTimer = setTimeout(updatePreview, PREVIEW_DELAY_MS);
+    }
+
+    function updatePreview() {
+        // Quantity does not change the label; leaving it out keeps the URL cacheable
+        const params = new URLSearchParams(new FormData(elements.form));
+        params.delete('printqty');
+        if (!params.get('oldprice') && !params.get('newprice')) {
+            elements.preview.classList.add('d-none');
+            return;
+        }
+        elements.preview.src = `/api/preview?${params}`;
+    }
+
+    // -----------------------------
+    // PRICE SUGGESTIONS
+    // -----------------------------
+    function refreshSuggestions() {
+        // A tablet left open keeps its page for days; revalidating the grid
+        // is a 304 unless the price settings changed in the meantime
+        if (document.visibilityState !== 'visible') return;
+        const tbody = elements.priceButtons.tBodies[0];
+        fetch('/api/suggestions?format=html')
+            .then(response => {
+                const etag = (response.headers.get('ETag') || '').replace(/"/g, '');
+                if (!response.ok || etag === tbody.dataset.etag) return;
+                return response.text().then(html => {
+                    tbody.innerHTML = html;
+                    tbody.dataset.etag = etag;
+                });
+            })
+            .catch(() => {});
+    }
+
+    function resetAfterPrint() {
+        // Same state a fresh page load used to give
+        cleanup();
+        document.getElementById("0").value = '';
+        const recentContainer = document.getElementById('recentContainer');
+        if (recentContainer) recentContainer.remove();
+        renderHistory();
     }
 
     function cleanup() {
@@ -220,10 +322,13 @@
         elements.newPrice.value = '';
         elements.printQty.value = '';
         document.getElementById("0").checked = true;
+        schedulePreview();
     }
 
     function clearHistory() {
         safeLocalStorage('set', STORAGE_KEYS.PRICE_HISTORY, JSON.stringify([]));
+        // Otherwise "Reprint Last" would still reprint the cleared label
+        safeLocalStorage('remove', STORAGE_KEYS.LAST_HISTORY_ID);
         const recentContainer = document.getElementById('recentContainer');
         if (recentContainer) recentContainer.remove();
         renderHistory();
@@ -256,6 +361,7 @@
 
         const radio = document.getElementById(entry.discount);
         if (radio) radio.checked = true;
+        schedulePreview();
     }
 
     function createHistoryButton(entry) {
@@ -347,6 +453,11 @@
         
 
         elements.priceButtons.addEventListener('click', handlePriceClick);
+        document.addEventListener('visibilitychange', refreshSuggestions);
+
+        elements.form.addEventListener('input', schedulePreview);
+        elements.preview.addEventListener('load', () => elements.preview.classList.remove('d-none'));
+        elements.preview.addEventListener('error', () => elements.preview.classList.add('d-none'));
 
         elements.qtyButtons.forEach(btn =>
             btn.addEventListener('click', handleQtyClick)
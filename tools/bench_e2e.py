@@ -0,0 +1,212 @@
+"""End-to-end throughput benchmark for zlp-server with a fake printer.
+
+Starts an emulated printer (printer_emulator.py) on loopback, port 9100 by
+default, that counts what it receives, loads zlp-server.py against a temporary config
+pointing at it and fires POST /api/print requests at the given
+concurrency. Reports request latency percentiles and throughput, plus
+labels per second measured at the printer. Runs offline; nothing outside
+a temporary folder is touched.
+
+Modes:
+    client  Flask test client, no sockets between client and app
+    http    real HTTP/1.1 keep-alive connections to waitress (or the Flask
+            dev server when waitress is not installed) on an ephemeral port
+
+Usage:
+    python ./tools/bench_e2e.py --mode client --clients 8 --requests 200
+    python ./tools/bench_e2e.py --mode http --clients 20 --label-ms 5
+    python ./tools/bench_e2e.py --json    # machine-readable result for CI
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import http.client
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from load_test import percentile  # noqa: E402
+from printer_emulator import EmulatedPrinter  # noqa: E402
+
+
+# ---------------------------------------
+# MARK: SERVER
+# ---------------------------------------
+def load_server(printer: EmulatedPrinter, workdir: str, coalesce_ms: int):
+    """Import zlp-server.py with its config and log redirected to `workdir`."""
+    import zlp_lib.zlp as zlp
+
+    cfg = dict(zlp.DEFAULT_CONFIG)
+    cfg.update({
+        "printer_ip": printer.host,
+        "printer_port": printer.port,
+        "print_mode": "NET/TCP",
+        "printers": [],
+        "printer_status_interval": 0,
+        "coalesce_window_ms": coalesce_ms,
+        "config_watch_interval": 0,
+    })
+    zlp.APP_FOLDER = workdir
+    zlp.CONFIG_FILE = str(Path(workdir) / "gui_config.json")
+    zlp.load_config = lambda: dict(cfg)
+
+    spec = importlib.util.spec_from_file_location("zlp_server_bench", ROOT / "zlp-server.py")
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    return server
+
+
+def start_http(app, threads: int):
+    """Serve `app` on an ephemeral loopback port; returns (port, stop)."""
+    try:
+        from waitress import create_server
+        server = create_server(app, host="127.0.0.1", port=0, threads=threads)
+        threading.Thread(target=server.run, daemon=True).start()
+        return server.effective_port, server.close
+    except ImportError:
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server.server_port, server.shutdown
+
+
+# ---------------------------------------
+# MARK: CLIENTS
+# ---------------------------------------
+def print_body(client_id: int, i: int) -> str:
+    # Distinct prices so coalescing does not merge requests unless asked to
+    return json.dumps({"oldprice": "", "newprice": str(100 + client_id * 10000 + i), "discount": "", "printqty": "1"})
+
+
+def test_client_worker(app, client_id: int, requests: int, latencies: list[float], errors: list[str], lock: threading.Lock):
+    client = app.test_client()
+    for i in range(requests):
+        started = time.perf_counter()
+        response = client.post("/api/print", data=print_body(client_id, i), content_type="application/json")
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors.append(str(response.status_code))
+
+
+def http_worker(port: int, client_id: int, requests: int, latencies: list[float], errors: list[str], lock: threading.Lock):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    for i in range(requests):
+        started = time.perf_counter()
+        try:
+            conn.request("POST", "/api/print", body=print_body(client_id, i), headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            error = str(response.status) if response.status >= 400 else None
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            error = str(e)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if error:
+                errors.append(error)
+    conn.close()
+
+
+# ---------------------------------------
+# MARK: BENCHMARK
+# ---------------------------------------
+def run(mode: str, clients: int, requests: int, label_ms: float, printer_port: int, coalesce_ms: int, drain_timeout: float) -> dict:
+    printer = EmulatedPrinter(port=printer_port, label_delay=label_ms / 1000)
+    with tempfile.TemporaryDirectory(prefix="zlp-bench-") as workdir:
+        server = load_server(printer, workdir, coalesce_ms)
+        stop = None
+        if mode == "http":
+            port, stop = start_http(server.app, threads=max(4, clients))
+            target, args = http_worker, (port,)
+        else:
+            target, args = test_client_worker, (server.app,)
+
+        latencies: list[float] = []
+        errors: list[str] = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=target, args=args + (n, requests, latencies, errors, lock))
+            for n in range(clients)
+        ]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+
+        # Wait for the writer threads to hand every label to the printer
+        expected = len(latencies) - len(errors)
+        deadline = time.monotonic() + drain_timeout
+        while printer.labels < expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        printed_in = (printer.last_label_at or started) - started
+
+        if stop is not None:
+            stop()
+        server.print_log.close()
+    printer.close()
+
+    return {
+        "mode": mode,
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": wall,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+        "labels": printer.labels,
+        "labels_expected": expected,
+        "labels_per_second": printer.labels / printed_in if printed_in > 0 else 0.0,
+        "printer_bytes": printer.bytes,
+        "printer_formats": printer.formats,
+        "printer_downloads": printer.downloads,
+        "printer_connections": printer.connections,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end zlp-server benchmark against a fake printer.")
+    parser.add_argument("--mode", choices=("client", "http"), default="client", help="Flask test client or real HTTP")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="Print requests per client")
+    parser.add_argument("--label-ms", type=float, default=0.0, help="Emulated print time per label")
+    parser.add_argument("--printer-port", type=int, default=9100, help="Fake printer port (0 picks a free one)")
+    parser.add_argument("--coalesce-ms", type=int, default=0, help="Server coalescing window (0 disables)")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Seconds to wait for queued labels")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the server's own log output")
+    args = parser.parse_args(argv)
+
+    # The server prints a line per job; keep it out of the report unless asked
+    with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+        result = run(args.mode, args.clients, args.requests, args.label_ms, args.printer_port, args.coalesce_ms, args.drain_timeout)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['mode']}: {result['requests']} requests, {result['errors']} errors in {result['seconds']:.2f} s ({result['rps']:.0f} req/s)")
+        print(f"latency p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | p99 {result['p99_ms']:.1f} ms | max {result['max_ms']:.1f} ms")
+        print(f"printer: {result['labels']}/{result['labels_expected']} labels ({result['labels_per_second']:.0f} labels/s), "
+              f"{result['printer_formats']} formats, {result['printer_downloads']} downloads, {result['printer_bytes']} bytes, "
+              f"{result['printer_connections']} connection(s)")
+    return 1 if result["errors"] or result["labels"] < result["labels_expected"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
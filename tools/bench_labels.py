@@ -0,0 +1,97 @@
+"""Microbenchmark for ZPL label generation.
+
+Compares the original f-string implementation of ``generate_label`` with the
+precompiled byte templates in ``zlp_server.labels``: bytes on the wire per
+label and generation time per call. The "stored" rows are the field-only
+^XF recalls sent once the layout is resident on the printer.
+It also times barcode validation of a whole import column, with NumPy
+(if installed) and in pure Python.
+
+Usage:
+    python .\\tools\\bench_labels.py [--number 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from zlp_server.labels import generate_label, generate_recall  # noqa: E402
+from zlp_server import barcodes  # noqa: E402
+
+
+def legacy_generate_label(label_type: str, top_text: str, qty: int = 1, bottom_text: str = "", discount: str = "") -> bytes:
+    """The pre-compilation implementation, kept verbatim for comparison."""
+    if label_type.lower() == "normal":
+        zpl = f"""
+        ^XA
+        ^CI28
+        ^PW248
+        ^LL176
+        ^LH0,0
+        ^FO10,70^FB248,1,0,C^A0N,40,40^FD{top_text}^FS
+        ^PQ{qty}
+        ^XZ
+        """
+    elif label_type.lower() == "sale":
+        zpl = f"""
+        ^XA
+        ^CI28
+        ^PW248
+        ^LL176
+        ^LH0,0
+
+        ^FO10,30^FB248,1,0,C^A0N,40,40^FD{top_text}^FS       ; Top price (centered)
+        ^FO10,45^GB228,4,4,B,0^FS                           ; Strikethrough line
+        ^FO10,67^FB248,1,0,C^A0N,20,20^FD{discount}^FS    ; Percentage
+        ^FO10,90^FB248,1,0,C^A0N,40,40^FD{bottom_text}^FS    ; Bottom price (centered)
+
+        ^PQ{qty}
+        ^XZ
+        """
+    else:
+        raise ValueError("label_type must be 'normal' or 'sale'")
+    return zpl.encode('utf-8')
+
+
+CASES = {
+    "normal": (("normal", "12 990 HUF"), {"qty": 1}),
+    "sale": (("sale", "12 990 HUF"), {"qty": 3, "bottom_text": "9 093 HUF", "discount": "- 30 %"}),
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ZPL label generation.")
+    parser.add_argument("--number", type=int, default=100_000, help="Calls per measurement")
+    parser.add_argument("--barcodes", type=int, default=50_000, help="Column size for the barcode check")
+    args = parser.parse_args(argv)
+
+    print(f"{'label':<8} {'impl':<8} {'bytes':>6} {'us/label':>9}")
+    for name, (pos, kw) in CASES.items():
+        for impl_name, impl in (("before", legacy_generate_label), ("after", generate_label), ("stored", generate_recall)):
+            size = len(impl(*pos, **kw))
+            seconds = min(timeit.repeat(lambda: impl(*pos, **kw), number=args.number, repeat=3))
+            print(f"{name:<8} {impl_name:<8} {size:>6} {seconds / args.number * 1e6:>9.3f}")
+
+    rng = random.Random(0)
+    bodies = ["".join(rng.choice("0123456789") for _ in range(12)) for _ in range(args.barcodes)]
+    codes = [body + str(barcodes.ean13_check_digit(body)) for body in bodies]
+    numpy = barcodes.np
+    print(f"\nEAN-13 check of {args.barcodes} codes")
+    for impl_name, module in (("numpy", numpy), ("python", None)):
+        if impl_name == "numpy" and numpy is None:
+            print(f"{impl_name:<8} not installed")
+            continue
+        barcodes.np = module
+        seconds = min(timeit.repeat(lambda: barcodes.parse_barcodes(codes), number=1, repeat=3))
+        print(f"{impl_name:<8} {seconds * 1e3:>8.1f} ms")
+    barcodes.np = numpy
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Stand-in for `lpr` to test USB mode on Linux without CUPS.
+
+On Linux and macOS USB mode prints through the zebra package, which runs
+`lpr -P<queue> -oraw` and writes the ZPL to its stdin. Installed as `lpr`
+on PATH, this script forwards that data to the printer emulator instead,
+treating the queue name as host:port.
+
+Usage:
+    mkdir -p /tmp/fake-lpr && ln -sf "$PWD/tools/fake_lpr.py" /tmp/fake-lpr/lpr
+    python ./tools/printer_emulator.py --port 9101 &
+    PATH=/tmp/fake-lpr:$PATH python ./zlp-server.py
+    # with "print_mode": "USB", "usb_printer": "127.0.0.1:9101" in gui_config.json
+
+A real CUPS raw queue works the same way without this script:
+    lpadmin -p zlp-emulator -E -v socket://127.0.0.1:9101   # "usb_printer": "zlp-emulator"
+"""
+from __future__ import annotations
+
+import argparse
+import socket
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Forward lpr input to an emulated printer.")
+    parser.add_argument("-P", dest="queue", default="127.0.0.1:9100", help="Printer as host:port")
+    parser.add_argument("-o", dest="options", action="append", default=[], help="Ignored (zebra passes -oraw)")
+    args = parser.parse_args(argv)
+
+    host, _, port = args.queue.rpartition(":")
+    data = sys.stdin.buffer.read()
+    try:
+        with socket.create_connection((host or "127.0.0.1", int(port or 9100)), timeout=5) as sock:
+            sock.sendall(data)
+    except (OSError, ValueError) as e:
+        print(f"lpr: {args.queue}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
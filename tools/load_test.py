@@ -0,0 +1,97 @@
+"""HTTP load test for a running zlp-server.
+
+Simulates a number of tablets that each keep one HTTP/1.1 connection open
+and repeatedly load the page (and optionally print), then reports
+throughput and latency percentiles. A stall shows up as a p99/max far above
+the median.
+
+Usage:
+    python .\\tools\\load_test.py --url http://127.0.0.1:5000 --clients 20 --requests 50
+    python .\\tools\\load_test.py --print    # also POST /api/print (sends real labels!)
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def client(host: str, port: int, requests: int, do_print: bool, latencies: list[float], errors: list[str], lock: threading.Lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    body = json.dumps({"oldprice": "", "newprice": "990", "discount": "", "printqty": "1"})
+    for i in range(requests):
+        started = time.perf_counter()
+        try:
+            if do_print and i % 2:
+                conn.request("POST", "/api/print", body=body, headers={"Content-Type": "application/json"})
+            else:
+                conn.request("GET", "/")
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            ok, response = False, e
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(str(getattr(response, "status", response)))
+    conn.close()
+
+
+def run(url: str, clients: int, requests: int, do_print: bool) -> dict:
+    parsed = urlparse(url)
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=client, args=(parsed.hostname, parsed.port or 80, requests, do_print, latencies, errors, lock))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": wall,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test a running zlp-server.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Server base URL")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent tablets")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per tablet")
+    parser.add_argument("--print", dest="do_print", action="store_true", help="Mix in POST /api/print requests")
+    args = parser.parse_args(argv)
+
+    result = run(args.url, args.clients, args.requests, args.do_print)
+    print(f"{result['requests']} requests, {result['errors']} errors in {result['seconds']:.2f} s ({result['rps']:.0f} req/s)")
+    print(f"latency p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | p99 {result['p99_ms']:.1f} ms | max {result['max_ms']:.1f} ms")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
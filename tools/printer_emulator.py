@@ -0,0 +1,234 @@
+"""ZPL printer emulator for testing discovery and printing without hardware.
+
+Listens on one or more loopback addresses (port 9100 by default) and
+behaves enough like a Zebra printer for the GUI scanner, test prints and
+the server:
+
+- answers ~HI (model banner) and ~HS (three host status strings)
+- parses ^XA...^XZ formats, counting labels (^PQ), ^DF downloads and
+  ^XF recalls, and stores ~DG graphics
+- error states (paper out, paused, head open, ribbon out, buffer full)
+  show up in ~HS, and "refuse" / "silent" simulate a dead or hung device
+- fixed delays for status replies and per printed label make runs
+  deterministic
+
+On Linux every 127.x.y.z address is routed to loopback, so several
+printers can share port 9100. Windows only answers on 127.0.0.1 unless
+more loopback addresses are configured.
+
+Usage:
+    python ./tools/printer_emulator.py                             # 127.0.0.1:9100
+    python ./tools/printer_emulator.py --hosts 127.0.0.2,127.0.0.3 --state paper_out
+    python ./tools/printer_emulator.py --reply-ms 50 --label-ms 20
+    python ./zlp-gui.py --dev --scan-loopback                       # discover them
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import socket
+import threading
+import time
+
+DEFAULT_MODEL = "ZD421-203dpi"
+DEFAULT_FIRMWARE = "V84.20.18Z"
+ERROR_STATES = ("paper_out", "paused", "head_open", "ribbon_out", "buffer_full")
+CONNECTION_STATES = ("refuse", "silent")
+
+PQ_RE = re.compile(rb"\^PQ(\d+)")
+DF_RE = re.compile(rb"\^DF([^\^~]+)")
+# ~DG data is ASCII, so it runs until the next command prefix
+DG_RE = re.compile(rb"~DG([^,\^~]+),\d+,\d+,[^\^~]*(?=[\^~])")
+
+
+# ---------------------------------------
+# MARK: PRINTER
+# ---------------------------------------
+class EmulatedPrinter:
+    """One emulated printer bound to `host:port`.
+
+    `states` is a set drawn from ERROR_STATES and CONNECTION_STATES and can
+    be changed while running. Counters (`bytes`, `formats`, `labels`,
+    `downloads`, `graphics`, `recalls`, `connections`) are cumulative; `reset()` clears
+    them. `reply_delay` is slept before each ~HI/~HS answer and
+    `label_delay` per printed label. `recv_buffer` (bytes) shrinks the
+    socket receive buffer to mimic a printer's small input buffer, so
+    queued data backs up in the sender like it does with real hardware.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 9100, model: str = DEFAULT_MODEL,
+                 states=(), reply_delay: float = 0.0, label_delay: float = 0.0, recv_buffer: int = 0):
+        self.model = model
+        self.states = set(states)
+        self.reply_delay = reply_delay
+        self.label_delay = label_delay
+        self.stored_formats = set()
+        self._lock = threading.Lock()
+        self.reset()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if recv_buffer:
+            # Accepted sockets inherit this
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer)
+        self._server.bind((host, port))
+        self._server.listen(16)
+        self.host, self.port = self._server.getsockname()
+        threading.Thread(target=self._accept, daemon=True, name=f"emulator-{self.host}").start()
+
+    def reset(self):
+        with self._lock:
+            self.bytes = 0
+            self.formats = 0
+            self.labels = 0
+            self.downloads = 0
+            self.graphics = 0
+            self.recalls = 0
+            self.connections = 0
+            self.last_label_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "host": self.host, "port": self.port, "states": sorted(self.states),
+                "bytes": self.bytes, "formats": self.formats, "labels": self.labels,
+                "downloads": self.downloads, "graphics": self.graphics, "recalls": self.recalls, "connections": self.connections,
+            }
+
+    def close(self):
+        self._server.close()
+
+    # MARK: Responses
+    def host_identification(self) -> bytes:
+        return f"\x02{self.model},{DEFAULT_FIRMWARE},8,8192KB\x03\r\n".encode("ascii")
+
+    def host_status(self) -> bytes:
+        flag = lambda state: "1" if state in self.states else "0"
+        first = f"030,{flag('paper_out')},{flag('paused')},0245,000,{flag('buffer_full')},0,0,000,0,0,0"
+        second = f"001,0,{flag('head_open')},{flag('ribbon_out')},1,2,6,0,00000000,1,{len(self.stored_formats):03d}"
+        return f"\x02{first}\x03\r\n\x02{second}\x03\r\n\x021234,0\x03\r\n".encode("ascii")
+
+    # MARK: Connection handling
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            if "refuse" in self.states:
+                conn.close()
+                continue
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        buffer = b""
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(65536)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buffer = self._handle(conn, buffer + data)
+
+    def _handle(self, conn: socket.socket, buffer: bytes) -> bytes:
+        # Host queries are answered immediately, outside of formats
+        for command, reply in ((b"~HI", self.host_identification), (b"~HS", self.host_status)):
+            while command in buffer:
+                buffer = buffer.replace(command, b"", 1)
+                if "silent" in self.states:
+                    continue
+                if self.reply_delay:
+                    time.sleep(self.reply_delay)
+                try:
+                    conn.sendall(reply())
+                except OSError:
+                    return b""
+
+        # Graphics downloads are stored like formats
+        while True:
+            match = DG_RE.search(buffer)
+            if not match:
+                break
+            buffer = buffer[:match.start()] + buffer[match.end():]
+            with self._lock:
+                self.bytes += len(match.group(0))
+                self.graphics += 1
+                self.stored_formats.add(match.group(1).strip())
+
+        # Complete formats are "printed"; a partial one waits for more data
+        while b"^XZ" in buffer:
+            block, buffer = buffer.split(b"^XZ", 1)
+            self._print(block + b"^XZ")
+        return buffer if b"^XA" in buffer or b"~DG" in buffer or buffer.endswith((b"~", b"~H", b"~D")) else b""
+
+    def _print(self, block: bytes):
+        with self._lock:
+            self.bytes += len(block)
+            self.formats += 1
+            download = DF_RE.search(block)
+            if download:
+                self.downloads += 1
+                self.stored_formats.add(download.group(1).strip())
+                return
+            if b"^XF" in block:
+                self.recalls += 1
+        # A printer with an error keeps the data but prints nothing
+        if self.states & set(ERROR_STATES):
+            return
+        match = PQ_RE.search(block)
+        qty = int(match.group(1)) if match else 1
+        if self.label_delay:
+            time.sleep(self.label_delay * qty)
+        with self._lock:
+            self.labels += qty
+            self.last_label_at = time.perf_counter()
+
+
+def start_printers(hosts: list[str], port: int = 9100, **options) -> list[EmulatedPrinter]:
+    """Start one emulated printer per host address."""
+    return [EmulatedPrinter(host, port, **options) for host in hosts]
+
+
+# ---------------------------------------
+# MARK: MAIN
+# ---------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Emulate Zebra ZPL printers on loopback addresses.")
+    parser.add_argument("--hosts", default="127.0.0.1", help="Comma-separated addresses to listen on")
+    parser.add_argument("--port", type=int, default=9100, help="Raw printing port")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model reported by ~HI")
+    parser.add_argument("--state", action="append", default=[], choices=ERROR_STATES + CONNECTION_STATES,
+                        help="Error state to report (repeatable)")
+    parser.add_argument("--reply-ms", type=float, default=0.0, help="Delay before answering ~HI / ~HS")
+    parser.add_argument("--label-ms", type=float, default=0.0, help="Print time per label")
+    parser.add_argument("--recv-buffer", type=int, default=0, help="Socket receive buffer in bytes (0 = OS default)")
+    parser.add_argument("--report", type=float, default=5.0, help="Seconds between counter reports (0 disables)")
+    args = parser.parse_args(argv)
+
+    hosts = [h.strip() for h in args.hosts.split(",") if h.strip()]
+    printers = start_printers(hosts, args.port, model=args.model, states=args.state,
+                              reply_delay=args.reply_ms / 1000, label_delay=args.label_ms / 1000,
+                              recv_buffer=args.recv_buffer)
+    for printer in printers:
+        print(f"Emulating {printer.model} on {printer.host}:{printer.port} {sorted(printer.states) or ''}")
+
+    try:
+        while True:
+            time.sleep(args.report or 3600)
+            if args.report:
+                for printer in printers:
+                    s = printer.stats()
+                    print(f"{s['host']}: {s['labels']} labels, {s['formats']} formats, "
+                          f"{s['downloads']} downloads, {s['graphics']} graphics, {s['recalls']} recalls, {s['bytes']} bytes, {s['connections']} connections")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for printer in printers:
+            printer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -602,6 +602,19 @@ class ControlGUI(QWidget):
         self.kill_all_servers()
         self.update_status()
 
+    def reload_server(self) -> bool:
+        # Ask the running server to pick up the saved settings in place
+        cfg = load_config()
+        try:
+            response = requests.post(
+                f"http://127.0.0.1:{cfg.get('server_port')}/reload",
+                headers={"X-Reload-Token": cfg.get("reload_token", "")},
+                timeout=3
+            )
+            return response.ok
+        except requests.exceptions.RequestException:
+            return False
+
     # ---------------------------------------
     # MARK: FUNCTIONS
     # ---------------------------------------
@@ -616,6 +629,7 @@ class ControlGUI(QWidget):
         flow.start_scan(self)
         
     def save_settings(self, show_message: bool = True, restart_server: bool = True) -> bool:
+        previous_port = str(load_config().get("server_port"))
         print_mode = "NET/TCP" if self.print_mode_net_rb.isChecked() else "USB"
         usb_printer = (self.usb_printer_combo.currentText() or "").strip()
         if usb_printer.startswith("(No USB printers"):
@@ -647,8 +661,12 @@ class ControlGUI(QWidget):
             QMessageBox.information(self, "Saved", "Configuration saved.")
 
         if restart_server:
-            self.stop_server()
-            QTimer.singleShot(4500, self.start_server)
+            # Only a port change needs a restart; everything else is reloaded live
+            if server_running() and previous_port == cfg["server_port"] and self.reload_server():
+                print("Server configuration reloaded.")
+            else:
+                self.stop_server()
+                QTimer.singleShot(4500, self.start_server)
 
         return True
         
@@ -1,34 +1,86 @@
 import sys
 import os
 import time
-import socket
 import signal
-from flask import Flask, render_template, request, jsonify
-from zebra import Zebra
+import atexit
+import threading
+import hmac
+import shutil
+import tempfile
+import re
+import json
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+from flask import Flask, Response, render_template, request, jsonify
 
-from zlp_lib.zlp import resource_path, load_config as load_cfg, APP_FOLDER
+try:
+    # Optional production WSGI server; falls back to the Flask dev server.
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
+from zlp_lib.zlp import resource_path, load_config as load_cfg, APP_FOLDER, CONFIG_FILE
+from zlp_server.connection import ConnectionPool
+from zlp_server.jobs import JobQueue
+from zlp_server.dispatch import PrinterDispatcher
+from zlp_server.health import HealthMonitor
+from zlp_server.coalesce import LabelCoalescer
+from zlp_server.labels import generate_label, generate_recall, graphic_formats, add_fields, STORED_FORMATS, LABEL_TYPE_ERROR
+from zlp_server.graphics import load_graphic
+from zlp_server.barcodes import parse_barcodes
+from zlp_server import pricing
+from zlp_server.usb import UsbPrinterPool
+from zlp_server.printlog import PrintLog
+from zlp_server.reload import ConfigWatcher
+from zlp_server.importer import ImportJob
+from zlp_server.journal import JobJournal
+from zlp_server.history import PrintHistory
+from zlp_server.preview import PreviewCache, available as preview_available
+from zlp_server import metrics
 
 # MARK: SETUP
+# Startup config: server, logging and other settings that need a restart.
+# Everything read while handling a request lives in `settings` (see
+# make_settings) and is swapped on reload
 cfg = load_cfg()
-currency = cfg.get("currency", "HUF")
-printer_ip = cfg.get("printer_ip", "127.0.0.1")
-printer_port = int(cfg.get("printer_port", 9100))
-show_decimals = cfg.get("show_decimals", False)
-decimal_places = cfg.get("decimal_places", 2)
-price_suggestion_type = cfg.get("price_suggestion_type", "Hungary")
-print_mode = cfg.get("print_mode", "NET/TCP")
-usb_printer_name = cfg.get("usb_printer", "")
-
-customConfig = {
-    'printer_ip': printer_ip,
-    'printer_port': printer_port,
-    'print_mode': print_mode,
-    'usb_printer': usb_printer_name,
-    'currency': currency,
-    'show_decimals': show_decimals,
-    'decimal_places': decimal_places,
-    'price_suggestion_type': price_suggestion_type
-}
+
+# Warm TCP connections to network printers, reused across jobs
+connection_pool = ConnectionPool(idle_timeout=float(cfg.get("printer_idle_timeout", 30)))
+atexit.register(connection_pool.close_all)
+
+# Cached spooler handles for USB printers
+usb_pool = UsbPrinterPool(idle_timeout=float(cfg.get("printer_idle_timeout", 30)))
+atexit.register(usb_pool.close_all)
+
+# Print log is written by a background thread, never on the request path
+print_log = PrintLog(os.path.join(APP_FOLDER, "log.txt"),
+    rotation=cfg.get("log_rotation", "size"),
+    max_bytes=int(cfg.get("log_max_bytes", 1048576)),
+    json_lines=bool(cfg.get("log_json", False)))
+atexit.register(print_log.close)
+
+# Every job is journaled to SQLite so queued labels survive a restart
+journal = JobJournal(os.path.join(APP_FOLDER, "jobs.db"),
+    retention_days=float(cfg.get("job_journal_retention_days", 30))) if cfg.get("job_journal", True) else None
+if journal is not None:
+    atexit.register(journal.close)
+
+# Print history shared by all tablets, searchable and reprintable by ID
+history = PrintHistory(os.path.join(APP_FOLDER, "history.db"),
+    retention_days=float(cfg.get("history_retention_days", 365)))
+atexit.register(history.close)
+
+# Rendered label previews by ZPL hash
+previews = PreviewCache(max_entries=int(cfg.get("preview_cache_size", 256)))
+
+# ^PQ quantity in stored ZPL, rewritten for reprints of a different quantity
+PQ_PATTERN = re.compile(rb"\^PQ\d+")
+
+# Price-list imports by ID, oldest dropped first
+MAX_TRACKED_IMPORTS = 20
+imports = {}
+import_lock = threading.Lock()
 
 # Initialize Flask app
 app = Flask(__name__,
@@ -36,74 +88,247 @@ app = Flask(__name__,
     static_folder=resource_path("static"))
 
 # MARK: FUNCTIONS
-def format_price(value):
-    # Format price based on settings
-    value = float(value)
-    return f"{value:.{decimal_places}f}" if show_decimals else str(int(round(value)))
-
-def generate_label(label_type: str, top_text: str, qty: int = 1, bottom_text: str = "", discount: str = "") -> bytes:
-    # Generate ZPL code for label
-    
-    # Normal label
-    if label_type.lower() == "normal":
-        zpl = f"""
-        ^XA
-        ^CI28
-        ^PW248
-        ^LL176
-        ^LH0,0
-        ^FO10,70^FB248,1,0,C^A0N,40,40^FD{top_text}^FS
-        ^PQ{qty}
-        ^XZ
-        """
-        
-    # Sale label
-    elif label_type.lower() == "sale":
-        zpl = f"""
-        ^XA
-        ^CI28
-        ^PW248
-        ^LL176
-        ^LH0,0
-
-        ^FO10,30^FB248,1,0,C^A0N,40,40^FD{top_text}^FS       ; Top price (centered)
-        ^FO10,45^GB228,4,4,B,0^FS                           ; Strikethrough line
-        ^FO10,67^FB248,1,0,C^A0N,20,20^FD{discount}^FS    ; Percentage
-        ^FO10,90^FB248,1,0,C^A0N,40,40^FD{bottom_text}^FS    ; Bottom price (centered)
-
-        ^PQ{qty}
-        ^XZ
-        """
+def make_settings(cfg: dict) -> dict:
+    # Snapshot of the reloadable settings. It is never modified after it is
+    # built; a reload builds a new one and swaps the global reference, so a
+    # request that grabbed `settings` sees one consistent config throughout
+    customConfig = {
+        'printer_ip': cfg.get("printer_ip", "127.0.0.1"),
+        'printer_port': int(cfg.get("printer_port", 9100)),
+        'print_mode': cfg.get("print_mode", "NET/TCP"),
+        'usb_printer': cfg.get("usb_printer", ""),
+        'currency': cfg.get("currency", "HUF"),
+        'show_decimals': cfg.get("show_decimals", False),
+        'decimal_places': cfg.get("decimal_places", 2),
+        'price_suggestion_type': cfg.get("price_suggestion_type", "Hungary")
+    }
+    graphics = label_graphics(cfg)
+    return {
+        "cfg": cfg,
+        "customConfig": customConfig,
+        "currency": customConfig["currency"],
+        "show_decimals": customConfig["show_decimals"],
+        "decimal_places": customConfig["decimal_places"],
+        # Stored formats per label type, with any graphics they place
+        "formats": { kind: graphic_formats(kind, graphics.get(kind, [])) for kind in STORED_FORMATS },
+        "preview_graphics": { kind: b"".join(g.inline(x, y) for g, x, y in items) for kind, items in graphics.items() },
+        "targets": printer_targets(cfg),
+        "suggestions": suggestion_grid(customConfig["price_suggestion_type"], customConfig["show_decimals"],
+            customConfig["decimal_places"], customConfig["currency"]),
+    }
+
+@lru_cache(maxsize=16)
+def suggestion_grid(kind: str, show_decimals: bool, decimal_places: int, currency: str) -> dict:
+    # The price buttons for one combination of settings, built once: the
+    # rows as an HTML fragment and a JSON document, each with its ETag.
+    # A reload that changes any of the four gets a new grid; an unchanged
+    # one reuses the cached grid
+    rows = pricing.suggestion_values(kind)
+    texts = iter(pricing.format_prices([value for row in rows for value in row], show_decimals, decimal_places))
+    rows = [[(value, next(texts)) for value in row] for row in rows]
+    html = app.jinja_env.get_template("suggestions.html").render(suggestions=rows, currency=currency)
+    body = json.dumps({ "type": kind, "currency": currency, "show_decimals": show_decimals, "decimal_places": decimal_places,
+        "rows": [[{ "price": f"{value}", "text": text } for value, text in row] for row in rows] }).encode("utf-8")
+    return {
+        "html": html,
+        "html_etag": hashlib.sha1(html.encode("utf-8")).hexdigest(),
+        "json": body,
+        "json_etag": hashlib.sha1(body).hexdigest(),
+    }
+
+def index_page(s: dict = None):
+    # The web form for the current settings
+    s = s or settings
+    return render_template("index.html", customConfig=s["customConfig"], suggestions=s["suggestions"])
+
+def label_graphics(cfg: dict) -> dict:
+    # Label type -> [(Graphic, x, y)] from cfg["label_graphics"]; images
+    # that cannot be loaded are logged and left off the label
+    graphics = {}
+    for label_type, items in (cfg.get("label_graphics") or {}).items():
+        for item in items:
+            path = os.path.join(APP_FOLDER, str(item.get("image", "")))
+            try:
+                graphic = load_graphic(path, os.path.join(APP_FOLDER, "graphics"),
+                    width=int(item.get("width", 0)) or None, threshold=int(item.get("threshold", 128)))
+                graphics.setdefault(label_type.lower(), []).append((graphic, int(item.get("x", 0)), int(item.get("y", 0))))
+            except (OSError, ValueError, RuntimeError) as e:
+                log(f"Label graphic {path} not loaded: {e}", False)
+    return graphics
+
+def label_formats(label_type: str, s: dict = None) -> list:
+    # (name, download) pairs a recall of this label type needs on the printer
+    s = s or settings
+    formats = s["formats"].get(label_type.lower())
+    if formats is None:
+        raise ValueError(LABEL_TYPE_ERROR)
+    return formats
+
+def format_price(value, s: dict = None):
+    # Format price based on settings (exact Decimal rounding, memoized)
+    s = s or settings
+    return pricing.format_price(value, s["show_decimals"], s["decimal_places"])
+
+def label_from_spec(spec, barcode: tuple = None) -> tuple:
+    # Build (label_type, recall ZPL) for one JSON label spec (same fields as
+    # generate_label). `barcode` is the spec's barcode already run through
+    # parse_barcodes, when the caller validated a whole batch at once
+    if not isinstance(spec, dict):
+        raise ValueError("label spec must be an object")
+    top_text = str(spec.get("top_text") or "").strip()
+    if not top_text:
+        raise ValueError("top_text is required")
+    try:
+        qty = int(spec.get("qty", 1) or 1)
+    except (TypeError, ValueError):
+        raise ValueError("qty must be a whole number")
+    if qty < 1:
+        raise ValueError("qty must be at least 1")
+    label_type = str(spec.get("label_type", "")).lower()
+    data = ""
+    if label_type in ("barcode", "ean13", "code128"):
+        label_type, data, error = barcode or parse_barcodes([spec.get("barcode", "")])[0]
+        if error:
+            raise ValueError(error)
+    return label_type, generate_recall(label_type, top_text, qty=qty,
+        bottom_text=str(spec.get("bottom_text") or ""), discount=str(spec.get("discount") or ""), barcode=data)
+
+def printer_target(mode: str, ip: str = "", port: int = 9100, usb_name: str = "") -> tuple:
+    # Identify a printer; jobs are serialized per target
+    if mode == "NET/TCP":
+        return ("NET/TCP", ip, int(port))
+    elif mode == "USB":
+        return ("USB", usb_name)
     else:
-        # Invalid label type
-        raise ValueError("label_type must be 'normal' or 'sale'")
-    return zpl.encode('utf-8')
-    
-def send_zpl(zpl_code: bytes):
+        raise ValueError("Invalid print mode specified.")
+
+def printer_targets(cfg: dict) -> list:
+    # The "printers" pool from config, or just the main printer
+    targets = [printer_target(p.get("print_mode", "NET/TCP"), p.get("printer_ip", ""), p.get("printer_port", 9100), p.get("usb_printer", ""))
+        for p in cfg.get("printers") or []]
+    return targets or [printer_target(cfg.get("print_mode", "NET/TCP"), cfg.get("printer_ip", "127.0.0.1"),
+        cfg.get("printer_port", 9100), cfg.get("usb_printer", ""))]
+
+def close_target(target: tuple):
+    # Close the pooled connection or spooler handle of a printer
+    if target[0] == "NET/TCP":
+        connection_pool.close(target[1], target[2])
+    elif target[0] == "USB":
+        usb_pool.close(target[1])
+
+def send_zpl(zpl_code: bytes, target: tuple = None, formats=()):
     # Send ZPL code to printer based on print mode
-    if print_mode == "NET/TCP":
-        net_zpl(printer_ip, printer_port, zpl_code)
-    elif print_mode == "USB":
-        usb_zpl(usb_printer_name, zpl_code)
+    target = target or settings["targets"][0]
+    started = time.perf_counter()
+    if target[0] == "NET/TCP":
+        net_zpl(target[1], target[2], zpl_code, formats)
+    elif target[0] == "USB":
+        usb_zpl(target[1], zpl_code, formats)
     else:
         raise ValueError("Invalid print mode specified.")
+    printer = metrics.printer_name(target)
+    metrics.SEND_SECONDS.observe(time.perf_counter() - started, printer)
+    metrics.BYTES_SENT.inc(printer, amount=len(zpl_code))
 
-def net_zpl(printer_ip: str, printer_port: int, zpl_code: bytes):
-    # Send ZPL code to network printer
+def net_zpl(printer_ip: str, printer_port: int, zpl_code: bytes, formats=()):
+    # Send ZPL code to network printer over its pooled connection; stored
+    # formats are downloaded once per connection
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((printer_ip, printer_port))
-            s.sendall(zpl_code)
+        connection_pool.get(printer_ip, printer_port).send(zpl_code, formats)
     except Exception as e:
         print(f"Failed to send ZPL code to network printer {printer_ip}:{printer_port}: {e}")
+        raise
  
-def usb_zpl(printer_name: str, zpl_code: bytes):
-    # Send ZPL code to USB printer
+def usb_zpl(printer_name: str, zpl_code: bytes, formats=()):
+    # Send ZPL code to USB printer through its cached handle
     try:
-        zebra = Zebra(printer_name)
-        zebra.output(zpl_code.decode('utf-8'))
+        usb_pool.get(printer_name).send(zpl_code, formats)
     except Exception as e:
         print(f"Failed to send ZPL code to USB printer {printer_name}: {e}")
+        raise
+
+def query_status(target: tuple):
+    # Raw ~HS reply for the health monitor; the USB spooler cannot answer
+    if target[0] == "NET/TCP":
+        return connection_pool.get(target[1], target[2]).query(b"~HS", frames=3)
+    return None
+
+def enqueue_zpl(zpl_code: bytes, description: str, formats=(), labels: int = 0, spec: dict = None, lane: str = "interactive"):
+    # Hand ZPL to a printer's writer thread and return immediately; "bulk"
+    # jobs give way to interactive ones at format boundaries
+    return dispatcher.submit(zpl_code, description, formats, labels, spec, lane)
+
+def enqueue_label(label_type: str, description: str, qty: int = 1, **fields) -> list:
+    # Queue a label; identical labels arriving within the coalescing window
+    # are merged into one ^PQ, each request keeping its own job handle
+    metrics.REQUESTS.inc(label_type)
+    if coalescer is not None:
+        return [coalescer.add(label_type, fields, qty, description)]
+    return dispatch_label(label_type, fields, qty, description)
+
+def dispatch_label(label_type: str, fields: dict, qty: int, description: str) -> list:
+    # Queue a label as field-only recalls of its stored format; large
+    # quantities are split across the printer pool
+    return dispatcher.submit_label(lambda n: generate_recall(label_type, qty=n, **fields), qty,
+        description, formats=label_formats(label_type), spec={ "label_type": label_type, "qty": qty, **fields })
+
+def on_job_finished(job):
+    # Log the outcome once the writer thread is done with a job
+    dispatcher.record(job)
+    if journal is not None:
+        journal.finish(job)
+    if job.status == "sent":
+        metrics.LABELS_PRINTED.inc(metrics.printer_name(job.target), amount=job.labels)
+        log(f"Printed {job.description}", True)
+    else:
+        metrics.FAILURES.inc(job.cause or "error")
+        log(f"Failed to print {job.description}: {job.error}", False)
+
+def flush_state():
+    # Write out everything still buffered in memory: labels in their
+    # coalescing window go to the job queue (and so the journal), then the
+    # journal, history and print log writers are flushed and stopped.
+    # Called before /stop signals, because on Windows os.kill terminates
+    # the process and no atexit handler runs
+    if coalescer is not None:
+        coalescer.flush_all()
+    if journal is not None:
+        journal.close()
+    history.close()
+    log("Server stopping", True)
+    print_log.close()
+
+def replay_journal():
+    # Re-queue jobs that were still waiting when the server last stopped
+    if journal is None:
+        return
+    entries = journal.unfinished()
+    # The journal keeps format names; downloads come from the current settings
+    downloads = dict(pair for formats in settings["formats"].values() for pair in formats)
+    for entry in entries:
+        target = entry["target"] if entry["target"] in dispatcher.targets else dispatcher.pick()
+        missing = [name for name in entry["formats"] if name not in downloads]
+        if missing:
+            log(f"Replayed job {entry['id']} recalls formats no longer configured: {', '.join(missing)}", False)
+        formats = [(name, downloads[name]) for name in entry["formats"] if name in downloads]
+        job = job_queue.submit(target, entry["zpl"], f"replay: {entry['description']}", formats,
+            entry["labels"], entry["spec"])
+        journal.mark_replayed(entry["id"], job.id)
+    if entries:
+        log(f"Replaying {len(entries)} unfinished job(s) from the journal", True)
+
+def parse_time(value):
+    # Query time as Unix seconds or an ISO date/time; None if not given
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def history_dict(entry: dict) -> dict:
+    # History entry as JSON, without the stored ZPL
+    return { key: value for key, value in entry.items() if key != "zpl" }
 
 def log(msg, success: bool):
     # Prepare log entry
@@ -111,61 +336,431 @@ def log(msg, success: bool):
     entry = f"{timestamp} - {'Error: ' if success == False else ''}{msg}"
     print(entry)
 
-    log_file = os.path.join(APP_FOLDER, "log.txt")
+    # Queue for the background log writer
+    print_log.write(msg, success)
 
-    # Append to log file
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(entry + "\n")
+def reload_settings() -> dict:
+    # Re-read the config file and swap in a new settings snapshot. Requests
+    # in flight finish with the snapshot they started with
+    global settings
+    new_settings = make_settings(load_cfg())
+    new_cfg = new_settings["cfg"]
+    with reload_lock:
+        dispatcher.reconfigure(new_settings["targets"],
+            strategy=new_cfg.get("printer_dispatch", "round_robin"),
+            split_qty_min=int(new_cfg.get("printer_split_qty", 10)))
+        health_monitor.targets = list(new_settings["targets"])
+        job_queue.max_hold = float(new_cfg.get("printer_hold_seconds", 60))
+        removed = set(settings["targets"]) - set(new_settings["targets"])
+        settings = new_settings
+    # Release printers that were removed or moved to another address
+    for target in removed:
+        close_target(target)
+    log(f"Configuration reloaded ({len(new_settings['targets'])} printer(s))", True)
+    return new_settings
 
-# MARK: ROUTES        
-@app.route("/", methods=["GET", "POST"])
-def index():
-    # Return form on GET
-    if request.method == "GET":
-        return render_template("index.html", customConfig=customConfig)
-
-    # Get form data
-    old = float(request.form.get("oldprice", "")) if request.form.get("oldprice", "") else 0.0
-    new = request.form.get("newprice", "")
-    disc = request.form.get("discount", "")
-    qty = int(request.form.get("printqty", 1) or 1)
-    
-    # Prepare texts
-    top_text = f"{format_price(old)} {currency}" if old else f"{format_price(new)} {currency}"
-    bottom_text = f"{format_price(float(old) * float(disc))} {currency}" if old and disc else ""
-    discount_text = f"- {round((1 - float(disc)) * 100)} %" if old and disc else ""
+def form_label(form, s: dict = None, barcode: tuple = None):
+    # Work out the label for the web form fields; returns
+    # (label_type, description, fields, qty), or None if both prices are empty.
+    # `barcode` is the form's barcode already run through parse_barcodes
+    s = s or settings
+    currency = s["currency"]
+    # JSON bodies can carry lists or objects; only plain values are fields
+    for field in ("oldprice", "newprice", "discount", "printqty", "barcode"):
+        value = form.get(field)
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise ValueError(f"{field} must be a string or a number")
+    old = pricing.to_decimal(form.get("oldprice", "")) if form.get("oldprice", "") else 0
+    new = form.get("newprice", "")
+    disc = form.get("discount", "")
+    qty = int(form.get("printqty", 1) or 1)
+    if qty < 1:
+        raise ValueError("qty must be at least 1")
 
     # Handle different cases
     # 1. Both old and new prices are empty
     if not old and not new:
-        log("Empty submission", False)
-        return render_template("index.html", customConfig=customConfig)
+        return None
 
-    # 2. New price only (normal label)
+    # Prepare texts
+    top_text = f"{format_price(old, s)} {currency}" if old else f"{format_price(new, s)} {currency}"
+    bottom_text = discount_text = ""
     if old and disc:
-        send_zpl(generate_label("sale", f"{top_text}", bottom_text=f"{bottom_text}", qty=qty, discount=f"{discount_text}"))      
-        log(f"Printed sale: {top_text} -> {bottom_text} | {discount_text}", True)
-        return render_template("index.html", customConfig=customConfig)
+        sale, percent = pricing.sale_price(old, disc, currency)
+        bottom_text = f"{format_price(sale, s)} {currency}"
+        discount_text = f"- {percent} %"
+
+    # 2. One price and a barcode (shelf label)
+    code = str(form.get("barcode", "") or "").strip()
+    if code:
+        if old and disc:
+            raise ValueError("Barcode labels cannot show a discount")
+        label_type, data, error = barcode or parse_barcodes([code])[0]
+        if error:
+            raise ValueError(error)
+        price_text = f"{format_price(new or old, s)} {currency}"
+        return label_type, f"{label_type}: {price_text} [{data}]", { "top_text": price_text, "barcode": data }, qty
 
-    # 3. Old price only (normal label)
+    # 3. New price only (normal label)
     if not old:
-        send_zpl(generate_label("normal", f"{top_text}", qty=qty))
-        log(f"Printed normal: {top_text}", True)
-        return render_template("index.html", customConfig=customConfig)
+        return "normal", f"normal: {top_text}", { "top_text": top_text }, qty
+
+    # 4. Old price, with or without discount (sale label)
+    return "sale", f"sale: {top_text} -> {bottom_text} | {discount_text}", \
+        { "top_text": top_text, "bottom_text": bottom_text, "discount": discount_text }, qty
+
+def form_prices(form, s: dict) -> tuple:
+    # (price paid, old price) as printed on the label, for the history index
+    old = form.get("oldprice", "")
+    if not old or str(form.get("barcode", "") or "").strip():
+        return float(format_price(form.get("newprice") or old, s)), None
+    disc = form.get("discount", "")
+    price = pricing.sale_price(old, disc, s["currency"])[0] if disc else old
+    return float(format_price(price, s)), float(format_price(old, s))
+
+def submit_print(form):
+    # Queue the label described by the web form fields and add it to the
+    # history; returns (jobs, history entry), or None if empty
+    s = settings
+    label = form_label(form, s)
+    if label is None:
+        metrics.FAILURES.inc("empty_submission")
+        log("Empty submission", False)
+        return None
+    label_type, description, fields, qty = label
+    jobs = enqueue_label(label_type, description, qty=qty, **fields)
+    price, old_price = form_prices(form, s)
+    entry = history.add(label_type, fields, qty, generate_recall(label_type, qty=qty, **fields), description,
+        price=price, old_price=old_price)
+    return jobs, entry
+
+def import_label(form, s: dict, barcode: tuple = None):
+    # One price-list row as (recall ZPL, stored formats, qty) for an import job
+    label = form_label(form, s, barcode)
+    if label is None:
+        return None
+    label_type, _, fields, qty = label
+    metrics.REQUESTS.inc(label_type)
+    return generate_recall(label_type, qty=qty, **fields), label_formats(label_type, s), qty
 
-    # 4. Both old and new prices, no discount (sale label)
-    if old and not disc:
-        send_zpl(generate_label("sale", f"{top_text}", bottom_text=f"{bottom_text}", qty=qty, discount=f"{discount_text}"))
-        log(f"Printed sale: {top_text} -> {bottom_text} | {discount_text}", True)
-        return render_template("index.html", customConfig=customConfig)
+def start_import(upload) -> ImportJob:
+    # Spool the upload to a temp file in fixed-size blocks, then print it
+    # from a background thread; the request returns right away
+    suffix = os.path.splitext(upload.filename or "")[1].lower() or ".csv"
+    fd, path = tempfile.mkstemp(prefix="zlp-import-", suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(upload.stream, f, 64 * 1024)
+
+    s = settings
+    job = ImportJob(path, upload.filename or f"upload{suffix}", lambda form, barcode: import_label(form, s, barcode),
+        lambda zpl, description, formats, labels: enqueue_zpl(zpl, description, formats, labels, { "import": upload.filename }, lane="bulk"),
+        chunk_labels=int(s["cfg"].get("import_chunk_labels", 200)))
+    with import_lock:
+        imports[job.id] = job
+        while len(imports) > MAX_TRACKED_IMPORTS:
+            imports.pop(next(iter(imports)))
+    log(f"Import started: {job.filename}", True)
+    return job.start()
+
+def job_response(jobs: list, entry: dict):
+    # Answer a print submission without waiting for the printer
+    if request.accept_mimetypes.best == "application/json":
+        response = jsonify({ "success": True, "job_id": jobs[0].id, "job_ids": [job.id for job in jobs], "status": jobs[0].status,
+            "history_id": entry["id"] })
+    else:
+        response = app.make_response(index_page())
+    response.headers["X-Job-Id"] = ",".join(job.id for job in jobs)
+    return response
+
+# Reloadable settings snapshot, swapped as a whole by reload_settings()
+settings = make_settings(cfg)
+reload_lock = threading.Lock()
+
+# Cached printer host status (~HS), polled in the background
+health_monitor = HealthMonitor(query_status, settings["targets"], interval=float(cfg.get("printer_status_interval", 5)))
+
+# One writer thread per printer; requests only enqueue. Jobs are held
+# while the cached status says the printer cannot print
+job_queue = JobQueue(lambda target, zpl, formats: send_zpl(zpl, target, formats), on_finished=on_job_finished,
+    gate=health_monitor.not_ready, max_hold=float(cfg.get("printer_hold_seconds", 60)),
+    on_submitted=journal.record if journal is not None else None)
+
+# Spreads jobs over the printer pool, away from printers that are not ready
+dispatcher = PrinterDispatcher(job_queue, settings["targets"],
+    strategy=cfg.get("printer_dispatch", "round_robin"),
+    split_qty_min=int(cfg.get("printer_split_qty", 10)),
+    is_ready=health_monitor.is_ready)
+
+# Merges repeated taps / duplicate POS requests for the same label
+coalesce_window_ms = int(cfg.get("coalesce_window_ms", 150))
+coalescer = LabelCoalescer(dispatch_label, job_queue, window_ms=coalesce_window_ms) if coalesce_window_ms > 0 else None
+if coalescer is not None:
+    # Registered after journal.close, so it runs first: labels still in
+    # their window are queued and journaled before the journal shuts
+    atexit.register(coalescer.flush_all)
+
+# Queue depth is read from the job queue at scrape time
+metrics.QUEUE_DEPTH.read = job_queue.depth
+
+# Picks up saved settings without restarting the server
+config_watcher = ConfigWatcher(CONFIG_FILE, reload_settings, interval=float(cfg.get("config_watch_interval", 1)))
+
+# MARK: ROUTES        
+@app.route("/", methods=["GET", "POST"])
+def index():
+    # Return form on GET
+    if request.method == "GET":
+        return index_page()
+
+    # Print and answer with the form again
+    try:
+        printed = submit_print(request.form)
+    except ValueError as e:
+        metrics.FAILURES.inc("invalid_request")
+        log(f"Invalid submission: {e}", False)
+        return index_page(), 400
+    if not printed:
+        return index_page()
+    return job_response(*printed)
+
+# JSON print route used by the web UI (same fields as the form)
+@app.route("/api/print", methods=["POST"])
+def printApi():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({ "success": False, "message": "Expected a JSON object." }), 400
+    try:
+        printed = submit_print(data)
+    except ValueError as e:
+        metrics.FAILURES.inc("invalid_request")
+        log(f"Invalid submission: {e}", False)
+        return jsonify({ "success": False, "message": "Invalid price, discount, quantity or barcode." }), 400
+    if not printed:
+        return jsonify({ "success": False, "message": "Empty submission." }), 400
+    jobs, entry = printed
+    return jsonify({ "success": True, "job_id": jobs[0].id, "job_ids": [job.id for job in jobs], "status": jobs[0].status,
+        "history_id": entry["id"] })
+
+# Batch print route: many labels, one ZPL stream, one printer session
+@app.route("/api/print/batch", methods=["POST"])
+def printBatch():
+    specs = request.get_json(silent=True)
+    if not isinstance(specs, list) or not specs:
+        return jsonify({ "success": False, "message": "Expected a non-empty JSON array of label specs." }), 400
+
+    s = settings
+    results = []
+    chunks = []
+    formats = set()
+    labels = 0
+    # Barcodes of the whole batch are validated in one call
+    coded = [i for i, spec in enumerate(specs) if isinstance(spec, dict) and "barcode" in spec]
+    barcodes = dict(zip(coded, parse_barcodes([specs[i]["barcode"] for i in coded])))
+    for i, spec in enumerate(specs):
+        try:
+            label_type, zpl = label_from_spec(spec, barcodes.get(i))
+            chunks.append(zpl)
+            formats.update(label_formats(label_type, s))
+            labels += int(spec.get("qty", 1) or 1)
+            metrics.REQUESTS.inc(label_type)
+            results.append({ "index": i, "success": True })
+        except ValueError as e:
+            metrics.FAILURES.inc("invalid_request")
+            results.append({ "index": i, "success": False, "message": str(e) })
+
+    if not chunks:
+        log(f"Batch rejected: none of {len(specs)} labels were valid", False)
+        return jsonify({ "success": False, "message": "No valid labels in batch.", "results": results }), 400
+
+    job = enqueue_zpl(b"".join(chunks), f"batch: {len(chunks)} of {len(specs)} labels", formats=sorted(formats), labels=labels,
+        spec={ "batch": [spec for spec, result in zip(specs, results) if result["success"]] }, lane="bulk")
+    for result in results:
+        if result["success"]:
+            result["job_id"] = job.id
+    return jsonify({ "success": True, "job_id": job.id, "status": job.status, "results": results })
+
+# Price-list import route: multipart upload of a .csv or .xlsx file
+@app.route("/api/import", methods=["POST"])
+def importUpload():
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({ "success": False, "message": "Upload a .csv or .xlsx file in the 'file' field." }), 400
+    if not upload.filename.lower().endswith((".csv", ".txt", ".xlsx")):
+        return jsonify({ "success": False, "message": "Only .csv and .xlsx price lists are supported." }), 400
+    job = start_import(upload)
+    return jsonify({ "success": True, "import_id": job.id, "import": job.to_dict() })
+
+# Import progress route
+@app.route("/api/import/<import_id>", methods=["GET"])
+def importStatus(import_id):
+    job = imports.get(import_id)
+    if job is None:
+        return jsonify({ "success": False, "message": "Unknown import ID." }), 404
+    return jsonify({ "success": True, "import": job.to_dict() })
+
+# Import cancel route: stops reading, chunks already queued still print
+@app.route("/api/import/<import_id>/cancel", methods=["POST"])
+def importCancel(import_id):
+    job = imports.get(import_id)
+    if job is None:
+        return jsonify({ "success": False, "message": "Unknown import ID." }), 404
+    job.cancel()
+    log(f"Import cancelled: {job.filename}", True)
+    return jsonify({ "success": True, "import": job.to_dict() })
+
+# Print history route: newest first, filtered by price, label type and time
+@app.route("/api/history", methods=["GET"])
+def historySearch():
+    try:
+        entries = history.search(
+            price=float(request.args["price"]) if request.args.get("price") else None,
+            old_price=float(request.args["old_price"]) if request.args.get("old_price") else None,
+            label_type=request.args.get("label_type") or None,
+            since=parse_time(request.args.get("since")),
+            until=parse_time(request.args.get("until")),
+            limit=int(request.args.get("limit", 50)))
+    except ValueError as e:
+        return jsonify({ "success": False, "message": f"Invalid query: {e}" }), 400
+    return jsonify({ "success": True, "entries": [history_dict(entry) for entry in entries] })
+
+# Reprint route: sends the stored ZPL of a history entry as is
+@app.route("/api/history/<int:entry_id>/reprint", methods=["POST"])
+def historyReprint(entry_id):
+    entry = history.get(entry_id)
+    if entry is None:
+        return jsonify({ "success": False, "message": "Unknown history ID." }), 404
+    data = request.get_json(silent=True) or {}
+    zpl, qty = entry["zpl"], entry["qty"]
+    if data.get("qty"):
+        try:
+            qty = int(data["qty"])
+        except (TypeError, ValueError):
+            qty = 0
+        if qty < 1:
+            return jsonify({ "success": False, "message": "qty must be a whole number of at least 1." }), 400
+        zpl = PQ_PATTERN.sub(b"^PQ%d" % qty, zpl)
+    metrics.REQUESTS.inc(entry["label_type"])
+    job = enqueue_zpl(zpl, f"reprint #{entry_id}: {entry['description']}", formats=label_formats(entry["label_type"]),
+        labels=qty, spec={ "reprint": entry_id, "qty": qty })
+    return jsonify({ "success": True, "job_id": job.id, "status": job.status, "history_id": entry_id })
+
+# Label preview route: the label the form fields would print, as a PNG.
+# Accepts the print form fields as query parameters (GET) or JSON (POST)
+@app.route("/api/preview", methods=["GET", "POST"])
+def previewLabel():
+    if not preview_available():
+        return jsonify({ "success": False, "message": "Label previews need Pillow (pip install pillow)." }), 501
+    s = settings
+    form = request.get_json(silent=True) if request.method == "POST" else request.args
+    if not isinstance(form, dict):
+        return jsonify({ "success": False, "message": "Expected a JSON object." }), 400
+    try:
+        label = form_label(form, s)
+    except ValueError:
+        return jsonify({ "success": False, "message": "Invalid price, discount, quantity or barcode." }), 400
+    if label is None:
+        return jsonify({ "success": False, "message": "Empty submission." }), 400
+
+    label_type, _, fields, _ = label
+    zpl = add_fields(generate_label(label_type, qty=1, **fields), s["preview_graphics"].get(label_type, b""))
+    png, etag, hit = previews.get(zpl)
+    metrics.PREVIEWS.inc("hit" if hit else "miss")
+    response = Response(png, mimetype="image/png")
+    # Same fields can render differently after a currency change, so
+    # browsers revalidate with the ETag instead of caching blindly
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+# Price suggestion route: the cached button grid as JSON, or as the HTML
+# rows of the index page with ?format=html (tablets refresh it in place)
+@app.route("/api/suggestions", methods=["GET"])
+def priceSuggestions():
+    grid = settings["suggestions"]
+    if request.args.get("format") == "html":
+        response = Response(grid["html"], mimetype="text/html")
+        response.set_etag(grid["html_etag"])
+    else:
+        response = Response(grid["json"], mimetype="application/json")
+        response.set_etag(grid["json_etag"])
+    # Revalidate every time: a config reload changes the grid under the same URL
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+# Printer status route, answered from the health monitor cache
+@app.route("/api/printer/status", methods=["GET"])
+def printerStatus():
+    printers = []
+    for target in dispatcher.targets:
+        printers.append({
+            **health_monitor.status(target),
+            "target": list(target),
+            "ready": health_monitor.is_ready(target),
+            "reason": health_monitor.not_ready(target),
+            "pending_jobs": job_queue.pending(target),
+        })
+    return jsonify({ "success": True, "printers": printers })
+
+# Job status route
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def jobStatus(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({ "success": False, "message": "Unknown job ID." }), 404
+    return jsonify({ "success": True, "job": job.to_dict() })
+
+# Prometheus metrics route
+@app.route("/metrics", methods=["GET"])
+def metricsRoute():
+    return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+# Reload config route, used by the GUI after saving settings
+@app.route("/reload", methods=["POST"])
+def reloadConfig():
+    token = settings["cfg"].get("reload_token", "")
+    if token:
+        if not hmac.compare_digest(request.headers.get("X-Reload-Token", ""), token):
+            return jsonify({ "success": False, "message": "Invalid reload token." }), 403
+    elif request.remote_addr not in ("127.0.0.1", "::1"):
+        return jsonify({ "success": False, "message": "Reload is only allowed from this computer." }), 403
+
+    try:
+        new_settings = reload_settings()
+    except Exception as e:
+        log(f"Configuration reload failed: {e}", False)
+        return jsonify({ "success": False, "message": f"Reload failed: {e}" }), 500
+    config_watcher.mark_current()
+    return jsonify({ "success": True, "message": "Configuration reloaded.", "printers": [list(t) for t in new_settings["targets"]] })
 
 # Stop server route
 @app.route('/stop', methods=['GET'])
 def stopServer():
+    flush_state()
     os.kill(os.getpid(), signal.SIGINT)
     return jsonify({ "success": True, "message": "Server is shutting down..." })
 
 # MARK: RUN SERVER
 if __name__ == "__main__":
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
-    app.run(debug=False, host="0.0.0.0", port=port, use_reloader=False)
+
+    # Open printer connections in the background so startup is not blocked
+    for target in dispatcher.targets:
+        if target[0] == "NET/TCP":
+            threading.Thread(target=connection_pool.preconnect, args=(target[1], target[2]), daemon=True).start()
+    connection_pool.start()
+    health_monitor.start()
+    config_watcher.start()
+    replay_journal()
+
+    if cfg.get("server_mode", "production") == "production" and waitress_serve is not None:
+        # Waitress buffers each request fully before handing it to a worker
+        # thread, so slow tablets on Wi-Fi do not tie up workers
+        waitress_serve(app, host="0.0.0.0", port=port,
+            threads=int(cfg.get("server_threads", 8)),
+            connection_limit=int(cfg.get("server_connection_limit", 100)),
+            channel_timeout=int(cfg.get("server_channel_timeout", 30)),
+            ident="zlp-server")
+    else:
+        if cfg.get("server_mode", "production") == "production":
+            print("waitress is not installed; using the Flask development server.")
+        app.run(debug=False, host="0.0.0.0", port=port, use_reloader=False, threaded=True)
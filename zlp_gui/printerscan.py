@@ -53,6 +53,10 @@ class ScannerWorker(QObject):
             # In dev mode scan a small range to keep things fast
             subnets = ["192.168.1.210/28"]
 
+        if "--scan-loopback" in sys.argv:
+            # Scan for printers from tools/printer_emulator.py
+            subnets = ["127.0.0.0/28"]
+
         for subnet in subnets:
             if getattr(self, "cancelled", False):
                 break
@@ -19,11 +19,67 @@ DEFAULT_CONFIG = {
     "print_mode": "NET/TCP",
     # Selected USB printer name (only used when print_mode == "USB")
     "usb_printer": "",
+    # Optional printer pool. When non-empty, jobs are spread over these
+    # printers instead of the single printer above. Each entry uses the same
+    # keys: {"print_mode": "NET/TCP", "printer_ip": "...", "printer_port": 9100}
+    # or {"print_mode": "USB", "usb_printer": "..."}.
+    # - "printer_dispatch": "round_robin" or "least_queued"
+    # - "printer_split_qty": quantities from this size up are split across printers
+    "printers": [],
+    "printer_dispatch": "round_robin",
+    "printer_split_qty": 10,
+    # Printer health: seconds between ~HS status polls (0 disables) and how
+    # long jobs wait for a paused / paper-out printer before failing
+    "printer_status_interval": 5,
+    "printer_hold_seconds": 60,
+    # Seconds without a print job before the printer connection is closed,
+    # so other programs and PCs can use the printer (0 keeps it open)
+    "printer_idle_timeout": 30,
+    # Identical labels submitted within this many milliseconds are printed
+    # as one job with the summed quantity (0 disables)
+    "coalesce_window_ms": 150,
+    # Price-list imports (/api/import) are sent to the printer in chunks of
+    # this many labels, at most two chunks queued at a time
+    "import_chunk_labels": 200,
+    # Job journal (jobs.db in the app folder): jobs still queued when the
+    # server stops are printed on the next start. Finished jobs are kept
+    # for job_journal_retention_days
+    "job_journal": True,
+    "job_journal_retention_days": 30,
+    # Server-side print history (history.db), searchable via /api/history
+    "history_retention_days": 365,
+    # Graphics (logos, artwork) per label type, drawn under the text, e.g.
+    # {"sale": [{"image": "sale.png", "x": 10, "y": 5, "width": 120}]}.
+    # Image paths are relative to the app folder; "width" (dots) and
+    # "threshold" (gray levels below it print, default 128) are optional. Images are converted
+    # once (cached in graphics/) and stored in printer memory once
+    "label_graphics": {},
+    # Rendered label previews (/api/preview) kept in memory
+    "preview_cache_size": 256,
     "currency": "HUF",
     "show_decimals": False,
     "decimal_places": 2,
     "price_suggestion_type": "Hungary",
-    "start_server_on_launch": True
+    "start_server_on_launch": True,
+    # Web server:
+    # - "server_mode": "production" (waitress) or "development" (Flask dev server)
+    # - worker threads, max open connections and idle/keep-alive timeout in seconds
+    "server_mode": "production",
+    "server_threads": 8,
+    "server_connection_limit": 100,
+    "server_channel_timeout": 30,
+    # Print log (log.txt) settings:
+    # - "log_rotation": "size" (keep log_max_bytes per file) or "daily"
+    # - "log_json": write one JSON object per line instead of plain text
+    "log_rotation": "size",
+    "log_max_bytes": 1048576,
+    "log_json": False,
+    # Live config reload: the server re-reads this file when it changes
+    # (checked every config_watch_interval seconds, 0 disables) or on
+    # POST /reload. If reload_token is set, /reload requires it in the
+    # X-Reload-Token header; otherwise only local requests are accepted.
+    "config_watch_interval": 1,
+    "reload_token": ""
 }
 
 def resource_path(relative_path):
@@ -93,9 +149,13 @@ def save_config(cfg):
 
     merged.update(cfg)
 
-    with open(CONFIG_FILE, "w") as f:
+    # Write to a temp file and swap it in, so the running server never
+    # reads a half-written config
+    tmp_file = CONFIG_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
         json.dump(merged, f, indent=4)
-        print("Config saved!")
+    os.replace(tmp_file, CONFIG_FILE)
+    print("Config saved!")
         
 def get_usb_printers():
     """Return a list of connected USB Zebra printers."""
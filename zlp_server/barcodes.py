@@ -0,0 +1,103 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import re
+
+try:
+    # Optional: computes check digits for a whole column in one array operation
+    import numpy as np
+except ImportError:
+    np = None
+
+# EAN-13 check digit weights for the first 12 digits
+EAN_WEIGHTS = (1, 3) * 6
+# Code 128 data must fit across the label at 2 dots per module
+MAX_BARCODE_DOTS = 228
+MODULE_DOTS = 2
+
+_DIGIT_RUN = re.compile(r"\d{4,}")
+
+
+# ---------------------------------------
+# MARK: CHECK DIGITS
+# ---------------------------------------
+def ean13_check_digit(code: str) -> int:
+    """Check digit for the first 12 digits of `code`."""
+    return (10 - (sum(map(int, code[0:12:2])) + 3 * sum(map(int, code[1:12:2]))) % 10) % 10
+
+def ean13_mismatches(codes: list) -> dict:
+    """{index: expected check digit} for the 13-digit codes whose last
+    digit is wrong.
+
+    With NumPy the codes are joined into one buffer and viewed as an N x 13
+    digit matrix, so the whole column is checked with one matrix-vector
+    product and one comparison; without it each code is summed in Python.
+    """
+    if not codes:
+        return {}
+    if np is not None:
+        digits = np.frombuffer("".join(codes).encode("ascii"), dtype=np.uint8).reshape(-1, 13).astype(np.int32) - 48
+        expected = (10 - digits[:, :12] @ np.array(EAN_WEIGHTS, dtype=np.int32) % 10) % 10
+        bad = np.flatnonzero(expected != digits[:, 12])
+        return dict(zip(bad.tolist(), expected[bad].tolist()))
+    mismatches = {}
+    for i, code in enumerate(codes):
+        expected = ean13_check_digit(code)
+        if expected != ord(code[12]) - 48:
+            mismatches[i] = expected
+    return mismatches
+
+def code128_modules(data: str) -> int:
+    """Width in modules of `data` as Code 128 in automatic mode (^BC ...,A).
+
+    Runs of 4+ digits pack two per symbol (subset C); every other character
+    takes one symbol. Start, check and stop are included.
+    """
+    symbols = 2
+    rest = len(data)
+    for run in _DIGIT_RUN.finditer(data):
+        length = len(run.group(0))
+        rest -= length
+        # A switch into subset C, unless the whole code is digits
+        symbols += length // 2 + length % 2 + (0 if length == len(data) else 1)
+    return (symbols + rest) * 11 + 13
+
+
+# ---------------------------------------
+# MARK: PARSING
+# ---------------------------------------
+def parse_barcodes(codes: list) -> list:
+    """Classify and validate a column of barcodes in one pass.
+
+    Returns one (label_type, data, error) per code:
+    - 13 digits: "ean13", the first 12 digits for ^BE (the printer adds
+      the check digit, so a wrong one in the input is an error here)
+    - 12 digits: UPC-A, printed as EAN-13 with a leading zero
+    - anything else: "code128", as given
+    `error` is None for a printable code, else a message. None (a JSON
+    null) counts as an empty code.
+    """
+    codes = ["" if code is None else str(code).strip() for code in codes]
+    results = [None] * len(codes)
+
+    numeric = [i for i, code in enumerate(codes) if len(code) in (12, 13) and code.isascii() and code.isdigit()]
+    full = [codes[i].rjust(13, "0") for i in numeric]
+    for i, code in zip(numeric, full):
+        results[i] = ("ean13", code[:12], None)
+    for position, expected in ean13_mismatches(full).items():
+        i = numeric[position]
+        results[i] = ("ean13", codes[i], f"Invalid EAN-13 check digit in {codes[i]} (expected {expected})")
+
+    if len(numeric) < len(codes):
+        for i, code in enumerate(codes):
+            if results[i] is not None:
+                continue
+            if not code:
+                results[i] = ("code128", code, "Barcode is empty")
+            elif not code.isascii() or not code.isprintable() or "^" in code or "~" in code:
+                results[i] = ("code128", code, f"Barcode {code} has characters Code 128 cannot encode")
+            elif code128_modules(code) * MODULE_DOTS > MAX_BARCODE_DOTS:
+                results[i] = ("code128", code, f"Barcode {code} is too long to fit on the label")
+            else:
+                results[i] = ("code128", code, None)
+    return results
@@ -0,0 +1,75 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import queue
+import sqlite3
+import threading
+import time
+
+
+# ---------------------------------------
+# MARK: SQLITE
+# ---------------------------------------
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, timeout=10)
+    db.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable across process crashes in WAL mode; only a power
+    # loss can drop the last few commits
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+# ---------------------------------------
+# MARK: WRITER
+# ---------------------------------------
+class BatchWriter:
+    """Background thread that writes queued items in batches.
+
+    `put()` only enqueues. The thread calls `flush(batch)` when `max_items`
+    are waiting or `interval` seconds after the first of them arrived, so
+    callers never wait on the disk. With `connect`, its result (e.g. a
+    SQLite connection, which must be used on the thread that opened it) is
+    opened on the writer thread, passed as `flush(db, batch)` and closed
+    on `close()`, which writes everything still queued first.
+    """
+    def __init__(self, flush, interval: float, max_items: int, name: str, connect=None):
+        self._flush = flush
+        self.interval = interval
+        self.max_items = max_items
+        self._connect = connect
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self._thread.start()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def close(self, timeout: float = 5):
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _run(self):
+        db = self._connect() if self._connect is not None else None
+        args = () if db is None else (db,)
+        batch = []
+        started = 0.0
+        while True:
+            # Block until the first item arrives, then only until the batch is due
+            timeout = max(0.0, started + self.interval - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+                timed_out = False
+            except queue.Empty:
+                item, timed_out = (), True
+
+            if item:
+                if not batch:
+                    started = time.monotonic()
+                batch.append(item)
+            if batch and (item is None or timed_out or len(batch) >= self.max_items):
+                self._flush(*args, batch)
+                batch = []
+            if item is None:
+                if db is not None:
+                    db.close()
+                return
@@ -0,0 +1,93 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import threading
+
+from zlp_server.jobs import PrintJob
+
+WINDOW_MS = 150
+
+
+# ---------------------------------------
+# MARK: COALESCER
+# ---------------------------------------
+class LabelCoalescer:
+    """Merges identical labels submitted within a short window into one ^PQ.
+
+    Every request gets its own tracked PrintJob handle right away. When the
+    window for a label closes, the summed quantity is printed once through
+    `submit(label_type, fields, qty, description) -> list[PrintJob]` and each
+    request handle is completed with the outcome of that merged print.
+    `flush_all()` submits every open window at once (at shutdown, so the
+    labels reach the job queue and its journal).
+    """
+    def __init__(self, submit, job_queue, window_ms: int = WINDOW_MS):
+        self._submit = submit
+        self._job_queue = job_queue
+        self.window = window_ms / 1000.0
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def add(self, label_type: str, fields: dict, qty: int, description: str) -> PrintJob:
+        key = (label_type, tuple(sorted(fields.items())))
+        handle = self._job_queue.track(PrintJob(description=description))
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = {"label_type": label_type, "fields": fields, "description": description, "qty": 0, "handles": []}
+                self._groups[key] = group
+                timer = threading.Timer(self.window, self._flush, args=(key,))
+                timer.daemon = True
+                timer.start()
+            group["qty"] += qty
+            group["handles"].append(handle)
+        return handle
+
+    def flush_all(self):
+        with self._lock:
+            keys = list(self._groups)
+        for key in keys:
+            self._flush(key)
+
+    def _flush(self, key: tuple):
+        with self._lock:
+            group = self._groups.pop(key, None)
+        if group is None:
+            # Already flushed by flush_all
+            return
+        handles = group["handles"]
+        description = group["description"]
+        if len(handles) > 1:
+            description = f"{description} ({len(handles)} requests merged)"
+
+        try:
+            jobs = self._submit(group["label_type"], group["fields"], group["qty"], description)
+        except Exception as e:
+            for handle in handles:
+                self._job_queue.complete(handle, "failed", str(e), notify=False)
+            return
+
+        # Request handles finish when every part of the merged print has
+        remaining = [len(jobs)]
+        failures = []
+        seen = set()
+        lock = threading.Lock()
+
+        def on_part_done(job):
+            with lock:
+                if job.id in seen:
+                    return
+                seen.add(job.id)
+                remaining[0] -= 1
+                if job.status != "sent":
+                    failures.append(job.error)
+                done = remaining[0] == 0
+            if done:
+                for handle in handles:
+                    handle.target = job.target
+                    self._job_queue.complete(handle, "failed" if failures else "sent", failures[0] if failures else None, notify=False)
+
+        for job in jobs:
+            job.callbacks.append(on_part_done)
+            if job.done.is_set():
+                on_part_done(job)
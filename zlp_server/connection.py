@@ -0,0 +1,244 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import select
+import socket
+import threading
+import time
+
+from zlp_server.metrics import CONNECT_SECONDS
+
+CONNECT_TIMEOUT = 3.0
+SEND_TIMEOUT = 10.0
+# Seconds without a print job before the socket is released, so the GUI,
+# the scanner and other PCs can reach a printer that takes one client
+IDLE_TIMEOUT = 30.0
+# Small kernel send buffer: data waiting for a slow printer stays in the
+# job queue, where interactive jobs can still go ahead of bulk ones
+SEND_BUFFER = 32 * 1024
+
+
+# ---------------------------------------
+# MARK: CONNECTION
+# ---------------------------------------
+class NoReply(TimeoutError):
+    """A host query got no complete reply in time.
+
+    Some ZPL-compatible printers never answer ~HS / ~HI, so this says
+    nothing about whether the printer can print.
+    """
+
+
+class PrinterConnection:
+    """Persistent raw TCP connection to a single network printer.
+
+    The socket is opened lazily and kept warm between jobs. Before every send
+    the socket is probed for a half-close (printer rebooted, idle timeout,
+    cable pulled) and re-established transparently when needed. A socket
+    that has not sent a job for `idle_timeout` seconds is closed
+    (`close_idle()`, or at the next send), because a printer that rebooted
+    without a FIN would otherwise swallow the next job silently.
+
+    Stored formats (^DF) and graphics (~DG) downloaded over the connection
+    are remembered until the next reconnect, since a dropped link usually
+    means the printer was power cycled and its RAM formats are gone. A
+    format whose download changed (e.g. a logo was added) is sent again.
+    """
+    def __init__(self, host: str, port: int, connect_timeout: float = CONNECT_TIMEOUT, send_timeout: float = SEND_TIMEOUT,
+                 idle_timeout: float = IDLE_TIMEOUT):
+        self.host = host
+        self.port = int(port)
+        self.connect_timeout = connect_timeout
+        self.send_timeout = send_timeout
+        self.idle_timeout = idle_timeout
+        self._sock = None
+        self._last_send = 0.0
+        self._loaded_formats = {}
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Open the connection now instead of on the first send."""
+        with self._lock:
+            self._ensure_connected()
+            self._last_send = time.monotonic()
+
+    def send(self, data: bytes, formats=()):
+        """Send raw bytes, reconnecting once if the warm socket turns out dead.
+
+        `formats` lists (name, download) pairs the data recalls; any not yet
+        stored on the printer in this session are sent ahead of the data.
+        Only a send that wrote nothing is retried: once part of the payload
+        was taken, a resend would print those labels twice, so the error
+        is raised instead.
+        """
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_connected()
+                self._last_send = time.monotonic()
+                missing = [(name, download) for name, download in formats if self._loaded_formats.get(name) != download]
+                payload = memoryview(b"".join([download for _, download in missing] + [data]))
+                sent = 0
+                try:
+                    while sent < len(payload):
+                        sent += self._sock.send(payload[sent:])
+                    self._loaded_formats.update(missing)
+                    return
+                except OSError:
+                    self._close()
+                    if attempt or sent:
+                        raise
+
+    def query(self, command: bytes, frames: int = 1, timeout: float = 2.0) -> bytes:
+        """Send a host query (~HS, ~HI) and read its STX...ETX framed reply.
+
+        Runs over the same warm socket as print jobs, because many printers
+        only serve one raw connection at a time. A missing reply raises
+        NoReply and leaves the connection open; a late reply is drained
+        before the next send. On an idle connection the socket is opened
+        for the query only, so status polling does not hold the printer.
+        """
+        with self._lock:
+            self._ensure_connected()
+            try:
+                self._sock.settimeout(timeout)
+                self._sock.sendall(command)
+                data = b""
+                while data.count(b"\x03") < frames:
+                    chunk = self._sock.recv(1024)
+                    if not chunk:
+                        raise ConnectionError("printer closed the connection")
+                    data += chunk
+                return data
+            except socket.timeout:
+                raise NoReply(f"no reply to {command.decode('ascii', 'replace')}") from None
+            except OSError:
+                self._close()
+                raise
+            finally:
+                if self._idle():
+                    self._close()
+                elif self._sock is not None:
+                    self._sock.settimeout(self.send_timeout)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def close_idle(self) -> bool:
+        """Close the socket if it has been idle too long; never waits for a send in progress."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._sock is not None and self._idle():
+                self._close()
+                return True
+            return False
+        finally:
+            self._lock.release()
+
+    def _idle(self) -> bool:
+        return self.idle_timeout > 0 and time.monotonic() - self._last_send > self.idle_timeout
+
+    def _ensure_connected(self):
+        if self._sock is not None and self._idle():
+            # Reconnect rather than trust a socket the printer may have forgotten
+            self._close()
+        if self._is_alive():
+            return
+        self._close()
+        started = time.perf_counter()
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        CONNECT_SECONDS.observe(time.perf_counter() - started, f"{self.host}:{self.port}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        sock.settimeout(self.send_timeout)
+        self._sock = sock
+        self._loaded_formats.clear()
+
+    def _is_alive(self) -> bool:
+        # An idle printer socket should never be readable. If it is, the peer
+        # either closed its side (recv returns b"") or sent unsolicited status
+        # bytes, which are drained so they do not pile up in the buffer.
+        if self._sock is None:
+            return False
+        try:
+            readable, _, errored = select.select([self._sock], [], [self._sock], 0)
+            if errored:
+                return False
+            if readable:
+                return self._sock.recv(4096) != b""
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+# ---------------------------------------
+# MARK: POOL
+# ---------------------------------------
+class ConnectionPool:
+    """Keeps one PrinterConnection per (host, port) for the server lifetime.
+
+    `start()` runs a background thread that releases idle sockets.
+    """
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self.idle_timeout > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="printer-idle")
+            self._thread.start()
+
+    def get(self, host: str, port: int) -> PrinterConnection:
+        key = (host, int(port))
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is None:
+                conn = PrinterConnection(host, port, idle_timeout=self.idle_timeout)
+                self._connections[key] = conn
+            return conn
+
+    def preconnect(self, host: str, port: int) -> bool:
+        """Warm up the connection to a printer; returns False if unreachable."""
+        try:
+            self.get(host, port).connect()
+            return True
+        except OSError as e:
+            print(f"Could not pre-connect to network printer {host}:{port}: {e}")
+            return False
+
+    def close(self, host: str, port: int):
+        """Close and forget the connection to one printer (removed from the config)."""
+        with self._lock:
+            conn = self._connections.pop((host, int(port)), None)
+        if conn is not None:
+            conn.close()
+
+    def close_idle(self):
+        with self._lock:
+            connections = list(self._connections.values())
+        for conn in connections:
+            conn.close_idle()
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1.0))
+            self.close_idle()
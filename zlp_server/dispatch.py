@@ -0,0 +1,91 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import itertools
+import threading
+import time
+
+RETRY_AFTER = 30.0
+SPLIT_QTY_MIN = 10
+
+
+# ---------------------------------------
+# MARK: DISPATCHER
+# ---------------------------------------
+class PrinterDispatcher:
+    """Spreads print jobs over a pool of printer targets.
+
+    Strategies:
+    - "round_robin": rotate through the healthy printers
+    - "least_queued": pick the healthy printer with the fewest unfinished jobs
+    A printer whose last job failed is skipped for `retry_after` seconds, as
+    is one that `is_ready(target)` (cached host status) reports as not ready.
+    If every printer is unhealthy, all of them are tried again.
+    """
+    def __init__(self, job_queue, targets: list, strategy: str = "round_robin",
+                 retry_after: float = RETRY_AFTER, split_qty_min: int = SPLIT_QTY_MIN, is_ready=None):
+        self.job_queue = job_queue
+        self.is_ready = is_ready
+        self.targets = list(targets)
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self.split_qty_min = split_qty_min
+        self._failed_at = {}
+        self._rotation = itertools.count()
+        self._lock = threading.Lock()
+
+    def reconfigure(self, targets: list, strategy: str = None, split_qty_min: int = None):
+        """Swap in a new printer pool; jobs already queued keep their printer."""
+        with self._lock:
+            self.targets = list(targets)
+            self._failed_at = {t: at for t, at in self._failed_at.items() if t in self.targets}
+            if strategy is not None:
+                self.strategy = strategy
+            if split_qty_min is not None:
+                self.split_qty_min = split_qty_min
+
+    def healthy_targets(self) -> list:
+        now = time.time()
+        with self._lock:
+            healthy = [t for t in self.targets if now - self._failed_at.get(t, 0.0) >= self.retry_after]
+        if self.is_ready is not None:
+            healthy = [t for t in healthy if self.is_ready(t)]
+        return healthy or list(self.targets)
+
+    def pick(self) -> tuple:
+        healthy = self.healthy_targets()
+        if self.strategy == "least_queued":
+            return min(healthy, key=self.job_queue.pending)
+        return healthy[next(self._rotation) % len(healthy)]
+
+    def submit(self, zpl: bytes, description: str = "", formats=(), labels: int = 0, spec: dict = None, lane: str = "interactive"):
+        return self.job_queue.submit(self.pick(), zpl, description, formats, labels, spec, lane)
+
+    def submit_label(self, render, qty: int, description: str = "", formats=(), spec: dict = None) -> list:
+        """Queue `qty` copies of a label, split across printers when large.
+
+        `render(qty)` returns the ZPL for a given quantity. Returns the jobs,
+        one per printer used.
+        """
+        healthy = self.healthy_targets()
+        if qty < self.split_qty_min or len(healthy) < 2:
+            return [self.submit(render(qty), description, formats, qty, spec)]
+
+        if self.strategy == "least_queued":
+            healthy.sort(key=self.job_queue.pending)
+        parts = min(len(healthy), qty)
+        base, extra = divmod(qty, parts)
+        jobs = []
+        for i, target in enumerate(healthy[:parts]):
+            part = base + (1 if i < extra else 0)
+            jobs.append(self.job_queue.submit(target, render(part), f"{description} [{part}/{qty}]", formats, part,
+                dict(spec, qty=part) if spec else None))
+        return jobs
+
+    def record(self, job):
+        """Job-finished hook: remember failures so the printer is skipped."""
+        with self._lock:
+            if job.status == "failed":
+                self._failed_at[job.target] = time.time()
+            else:
+                self._failed_at.pop(job.target, None)
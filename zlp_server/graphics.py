@@ -0,0 +1,195 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import zlib
+
+try:
+    # Optional: only needed to convert new images; cached graphics load without it
+    from PIL import Image
+except ImportError:
+    Image = None
+
+THRESHOLD = 128
+CACHE_VERSION = 1
+
+# ACS repeat counts: G..Y = 1..19, g..z = 20..400 in steps of 20
+_COUNT_LOW = "GHIJKLMNOPQRSTUVWXY"
+_COUNT_HIGH = "ghijklmnopqrstuvwxyz"
+_RUN = re.compile(r"(.)\1*")
+
+
+# ---------------------------------------
+# MARK: ENCODING
+# ---------------------------------------
+def _repeat(count: int) -> str:
+    prefix = "z" * (count // 400)
+    count %= 400
+    if count >= 20:
+        prefix += _COUNT_HIGH[count // 20 - 1]
+    if count % 20:
+        prefix += _COUNT_LOW[count % 20 - 1]
+    return prefix
+
+def encode_acs(bitmap: bytes, bytes_per_row: int) -> bytes:
+    """ASCII hex with Zebra's ACS run-length compression.
+
+    Per row: ":" repeats the previous row, "," and "!" fill the rest of the
+    row with 0 or F, and runs of one hex digit get a repeat count prefix.
+    """
+    rows = []
+    previous = None
+    for start in range(0, len(bitmap), bytes_per_row):
+        row = bitmap[start:start + bytes_per_row].hex().upper()
+        if row == previous:
+            rows.append(":")
+            continue
+        previous = row
+        tail = ""
+        if row.endswith("00"):
+            row, tail = row.rstrip("0"), ","
+        elif row.endswith("FF"):
+            row, tail = row.rstrip("F"), "!"
+        rows.append("".join(run if len(run) < 3 else _repeat(len(run)) + run[0]
+            for run in (m.group(0) for m in _RUN.finditer(row))) + tail)
+    return "".join(rows).encode("ascii")
+
+def encode_z64(bitmap: bytes) -> bytes:
+    """":Z64:" + base64 of the deflated bitmap + ":" + CRC-16 of the base64 text."""
+    data = base64.b64encode(zlib.compress(bitmap, 9))
+    return b":Z64:%b:%04X" % (data, binascii.crc_hqx(data, 0))
+
+def encode(bitmap: bytes, bytes_per_row: int) -> bytes:
+    # Whichever is shorter: ACS wins on simple line art, Z64 on detailed images
+    return min(encode_acs(bitmap, bytes_per_row), encode_z64(bitmap), key=len)
+
+def decode(data: bytes, total: int, bytes_per_row: int) -> bytes:
+    """Raw bitmap from ^GF/~DG ASCII data (plain hex, ACS or Z64)."""
+    if data.startswith(b":Z64:"):
+        payload = data[5:].rsplit(b":", 1)[0]
+        return zlib.decompress(base64.b64decode(payload))[:total]
+    if data.startswith(b":B64:"):
+        return base64.b64decode(data[5:].rsplit(b":", 1)[0])[:total]
+
+    width = bytes_per_row * 2
+    rows, row, previous, count = [], "", "0" * width, 0
+    def finish(filled: str):
+        nonlocal row, previous
+        previous = filled[:width]
+        rows.append(previous)
+        row = ""
+    for char in data.decode("ascii").replace("\r", "").replace("\n", ""):
+        if char in _COUNT_LOW:
+            count += _COUNT_LOW.index(char) + 1
+        elif char in _COUNT_HIGH:
+            count += (_COUNT_HIGH.index(char) + 1) * 20
+        elif char == ":":
+            finish(previous)
+        elif char == ",":
+            finish(row.ljust(width, "0"))
+        elif char == "!":
+            finish(row.ljust(width, "F"))
+        else:
+            row += char * (count or 1)
+            count = 0
+            if len(row) >= width:
+                finish(row)
+    if row:
+        finish(row.ljust(width, "0"))
+    return bytes.fromhex("".join(rows))[:total].ljust(total, b"\0")
+
+
+# ---------------------------------------
+# MARK: GRAPHICS
+# ---------------------------------------
+class Graphic:
+    """A monochrome image encoded for ZPL.
+
+    `download()` is a (name, ~DG job) pair for the print path's stored
+    formats, so the image is sent to printer RAM once per connection;
+    `recall(x, y)` places it with ^IM. `inline(x, y)` is a self-contained
+    ^GF field for one-off use (previews). The name is derived from the
+    content, so a changed image never collides with one already stored.
+    """
+    def __init__(self, name: str, bytes_per_row: int, total: int, data: bytes):
+        self.name = name
+        self.bytes_per_row = bytes_per_row
+        self.total = total
+        self.data = data
+
+    @property
+    def width(self) -> int:
+        return self.bytes_per_row * 8
+
+    @property
+    def height(self) -> int:
+        return self.total // self.bytes_per_row
+
+    def download(self) -> tuple:
+        return self.name, b"~DG%b,%d,%d,%b" % (self.name.encode("ascii"), self.total, self.bytes_per_row, self.data)
+
+    def recall(self, x: int, y: int) -> bytes:
+        return b"^FO%d,%d^IM%b^FS" % (x, y, self.name.encode("ascii"))
+
+    def inline(self, x: int, y: int) -> bytes:
+        return b"^FO%d,%d^GFA,%d,%d,%d,%b^FS" % (x, y, self.total, self.total, self.bytes_per_row, self.data)
+
+    def to_dict(self) -> dict:
+        return {"version": CACHE_VERSION, "name": self.name, "bytes_per_row": self.bytes_per_row,
+                "total": self.total, "data": self.data.decode("ascii")}
+
+
+def to_bitmap(image, width: int = None, threshold: int = THRESHOLD) -> tuple:
+    """(bytes_per_row, bitmap) for a Pillow image, 1 bits = printed dots.
+
+    Transparent areas count as white. `width` scales the image to that many
+    dots, keeping its aspect ratio.
+    """
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    gray = image.convert("L")
+    if width and width != gray.width:
+        gray = gray.resize((width, max(1, round(gray.height * width / gray.width))), Image.LANCZOS)
+    # Mode "1" packs 8 dots per byte, MSB first, rows padded to whole bytes
+    bits = gray.point(lambda p: 255 if p < threshold else 0, "1")
+    return (bits.width + 7) // 8, bits.tobytes()
+
+def load_graphic(path: str, cache_dir: str, width: int = None, threshold: int = THRESHOLD) -> Graphic:
+    """Graphic for an image file, converted once and then read from `cache_dir`.
+
+    The cache key is a hash of the file's bytes and the conversion options,
+    so editing the image (or its width / threshold) converts it again.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(b"|%d|%d" % (width or 0, threshold))
+    key = digest.hexdigest()
+    cache_path = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") == CACHE_VERSION:
+            return Graphic(cached["name"], cached["bytes_per_row"], cached["total"], cached["data"].encode("ascii"))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if Image is None:
+        raise RuntimeError("Converting images needs Pillow (pip install pillow).")
+    with Image.open(path) as image:
+        bytes_per_row, bitmap = to_bitmap(image, width, threshold)
+    # Printer object names are 8.3; 7 hex digits of the hash keep them unique enough
+    graphic = Graphic(f"R:G{key[:7].upper()}.GRF", bytes_per_row, len(bitmap), encode(bitmap, bytes_per_row))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(graphic.to_dict(), f)
+    os.replace(tmp_path, cache_path)
+    return graphic
@@ -0,0 +1,120 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import threading
+import time
+
+from zlp_server.connection import NoReply
+
+POLL_INTERVAL = 5.0
+# A printer that did not answer ~HS is asked again only after this many
+# seconds: each unanswered query holds its connection for the reply timeout
+NO_REPLY_BACKOFF = 300.0
+
+
+# ---------------------------------------
+# MARK: PARSER
+# ---------------------------------------
+def parse_host_status(raw: bytes) -> dict:
+    """Parse a ~HS response (three STX...ETX framed strings).
+
+    String 1: aaa,b,c,dddd,eee,f,...  b = paper out, c = pause,
+              eee = formats in receive buffer, f = buffer full
+    String 2: mmm,n,o,p,...,uuuuuuuu  o = head up (open), p = ribbon out,
+              uuuuuuuu = labels remaining in batch
+    """
+    frames = []
+    for part in raw.split(b"\x02")[1:]:
+        frames.append(part.split(b"\x03", 1)[0].decode("ascii", errors="ignore").strip().split(","))
+    if len(frames) < 2 or len(frames[0]) < 6 or len(frames[1]) < 9:
+        raise ValueError(f"Unexpected ~HS response: {raw!r}")
+
+    first, second = frames[0], frames[1]
+    return {
+        "paper_out": first[1] == "1",
+        "paused": first[2] == "1",
+        "buffer_full": first[5] == "1",
+        "formats_in_buffer": int(first[4] or 0),
+        "head_open": second[2] == "1",
+        "ribbon_out": second[3] == "1",
+        "labels_remaining": int(second[8] or 0),
+    }
+
+def not_ready_reason(status: dict):
+    """Why a printer cannot take jobs right now, or None if it can."""
+    if not status.get("online", True):
+        return f"offline ({status.get('error') or 'no response'})"
+    for flag, reason in (("paper_out", "paper out"), ("head_open", "head open"), ("paused", "paused"), ("buffer_full", "buffer full")):
+        if status.get(flag):
+            return reason
+    return None
+
+
+# ---------------------------------------
+# MARK: MONITOR
+# ---------------------------------------
+class HealthMonitor:
+    """Polls printer host status in the background and caches the result.
+
+    `query(target)` returns the raw ~HS response for a target, or None when
+    the transport cannot report status (USB spooler). A printer that does
+    not answer ~HS is "unknown", not offline: only a failed connection or a
+    flag the printer reports holds jobs, and it is polled again only after
+    `no_reply_backoff` seconds, so print jobs do not keep waiting behind
+    queries it will not answer. Readers only ever see the cache, so status
+    checks never touch the device.
+    """
+    def __init__(self, query, targets: list, interval: float = POLL_INTERVAL, no_reply_backoff: float = NO_REPLY_BACKOFF):
+        self._query = query
+        self.targets = list(targets)
+        self.interval = interval
+        self.no_reply_backoff = no_reply_backoff
+        self._cache = {}
+        self._backoff_until = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="printer-health")
+            self._thread.start()
+
+    def poll(self, target: tuple):
+        status = {"checked": time.time()}
+        try:
+            raw = self._query(target)
+            if raw is None:
+                status["online"] = None
+            else:
+                status.update(parse_host_status(raw))
+                status["online"] = True
+        except NoReply as e:
+            status["online"] = None
+            status["error"] = str(e)
+            self._backoff_until[target] = time.monotonic() + self.no_reply_backoff
+        except Exception as e:
+            status["online"] = False
+            status["error"] = str(e)
+        with self._lock:
+            self._cache[target] = status
+
+    def status(self, target: tuple) -> dict:
+        with self._lock:
+            return dict(self._cache.get(target, {"online": None, "checked": None}))
+
+    def not_ready(self, target: tuple):
+        """Cached not-ready reason for a target; unknown counts as ready."""
+        status = self.status(target)
+        if status.get("online") is None:
+            return None
+        return not_ready_reason(status)
+
+    def is_ready(self, target: tuple) -> bool:
+        return self.not_ready(target) is None
+
+    def _run(self):
+        while True:
+            for target in list(self.targets):
+                if time.monotonic() >= self._backoff_until.get(target, 0):
+                    self.poll(target)
+            time.sleep(self.interval)
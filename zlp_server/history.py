@@ -0,0 +1,164 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import itertools
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from zlp_server.batchwriter import BatchWriter, connect_sqlite
+
+FLUSH_INTERVAL = 0.2
+FLUSH_ROWS = 500
+CACHE_SIZE = 1000
+RETENTION_DAYS = 365
+MAX_RESULTS = 500
+
+COLUMNS = ("id", "created", "label_type", "price", "old_price", "qty", "top_text", "bottom_text", "discount", "description", "zpl")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    label_type TEXT NOT NULL,
+    price REAL,
+    old_price REAL,
+    qty INTEGER NOT NULL,
+    top_text TEXT NOT NULL,
+    bottom_text TEXT NOT NULL,
+    discount TEXT NOT NULL,
+    description TEXT NOT NULL,
+    zpl BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_created ON history (created);
+CREATE INDEX IF NOT EXISTS history_price ON history (price, created);
+CREATE INDEX IF NOT EXISTS history_old_price ON history (old_price, created);
+CREATE INDEX IF NOT EXISTS history_label_type ON history (label_type, created);
+"""
+
+
+# ---------------------------------------
+# MARK: HISTORY
+# ---------------------------------------
+class PrintHistory:
+    """Server-side print history in SQLite, shared by every tablet.
+
+    Entries are indexed by price (what the customer pays), old price, label
+    type and time, so searches are index range scans that stop at `limit`.
+    `add()` hands out the entry ID right away; a background thread writes
+    rows in batches. Entries not written yet, and the most recent
+    `cache_size` ones, are kept in memory, so a reprint right after a print
+    never touches the disk. Each entry keeps its rendered ZPL for reprints.
+    """
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, flush_rows: int = FLUSH_ROWS,
+                 cache_size: int = CACHE_SIZE, retention_days: float = RETENTION_DAYS):
+        self.path = path
+        self.cache_size = cache_size
+        with connect_sqlite(path) as db:
+            db.executescript(SCHEMA)
+            if retention_days > 0:
+                db.execute("DELETE FROM history WHERE created < ?", (time.time() - retention_days * 86400,))
+            last_id = db.execute("SELECT MAX(id) FROM history").fetchone()[0] or 0
+        self._ids = itertools.count(last_id + 1)
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = BatchWriter(self._flush, flush_interval, flush_rows, "print-history", connect=lambda: connect_sqlite(path))
+
+    def add(self, label_type: str, fields: dict, qty: int, zpl: bytes, description: str,
+            price: float = None, old_price: float = None) -> dict:
+        entry = {
+            "id": next(self._ids),
+            "created": time.time(),
+            "label_type": label_type,
+            "price": price,
+            "old_price": old_price,
+            "qty": qty,
+            "top_text": fields.get("top_text", ""),
+            "bottom_text": fields.get("bottom_text", ""),
+            "discount": fields.get("discount", ""),
+            "description": description,
+            "zpl": zpl,
+        }
+        with self._lock:
+            self._pending[entry["id"]] = entry
+            self._remember(entry)
+        self._writer.put(entry)
+        return entry
+
+    def get(self, entry_id: int):
+        with self._lock:
+            entry = self._cache.get(entry_id)
+        if entry is not None:
+            return entry
+        row = self._reader().execute(f"SELECT {', '.join(COLUMNS)} FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def search(self, price: float = None, old_price: float = None, label_type: str = None,
+               since: float = None, until: float = None, limit: int = 50) -> list:
+        """Newest entries first, filtered by any combination of criteria."""
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        criteria = (("price", "=", price), ("old_price", "=", old_price), ("label_type", "=", label_type),
+            ("created", ">=", since), ("created", "<", until))
+        where = [(column, op, value) for column, op, value in criteria if value is not None]
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM history"
+        if where:
+            sql += " WHERE " + " AND ".join(f"{column} {op} ?" for column, op, _ in where)
+        sql += " ORDER BY created DESC LIMIT ?"
+        rows = self._reader().execute(sql, [value for _, _, value in where] + [limit]).fetchall()
+        entries = [self._entry(row) for row in rows]
+
+        # Entries the writer has not committed yet
+        with self._lock:
+            pending = [entry for entry in self._pending.values() if all(self._match(entry, c) for c in where)]
+        if pending:
+            seen = {entry["id"] for entry in entries}
+            entries.extend(entry for entry in pending if entry["id"] not in seen)
+            entries.sort(key=lambda entry: entry["created"], reverse=True)
+        return entries[:limit]
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        self._writer.close()
+
+    def _remember(self, entry: dict):
+        self._cache[entry["id"]] = entry
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _match(entry: dict, criterion: tuple) -> bool:
+        column, op, value = criterion
+        actual = entry[column]
+        if actual is None:
+            return False
+        if op == "=":
+            return actual == value
+        return actual >= value if op == ">=" else actual < value
+
+    @staticmethod
+    def _entry(row: tuple) -> dict:
+        entry = dict(zip(COLUMNS, row))
+        entry["zpl"] = bytes(entry["zpl"])
+        return entry
+
+    def _reader(self) -> sqlite3.Connection:
+        # One read connection per request thread; WAL readers never block the writer
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = connect_sqlite(self.path)
+        return db
+
+    def _flush(self, db: sqlite3.Connection, batch: list):
+        try:
+            with db:
+                db.executemany(f"INSERT OR REPLACE INTO history ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [tuple(entry[column] for column in COLUMNS) for entry in batch])
+        except sqlite3.Error as e:
+            print(f"Failed to write print history {self.path}: {e}")
+            return
+        with self._lock:
+            for entry in batch:
+                self._pending.pop(entry["id"], None)
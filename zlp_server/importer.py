@@ -0,0 +1,322 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import codecs
+import csv
+import os
+import threading
+import time
+import uuid
+from zlp_server.barcodes import parse_barcodes
+from zlp_server.pricing import to_decimal
+
+try:
+    # Optional: only needed for .xlsx price lists
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+CHUNK_LABELS = 200
+MAX_INFLIGHT_CHUNKS = 2
+MAX_ROW_ERRORS = 20
+# Rows whose barcodes are validated together
+BLOCK_ROWS = 1000
+# Excel saves CSV in the ANSI code page, cp1250 in Hungary, Poland and Czechia
+CSV_FALLBACK_ENCODING = "cp1250"
+
+
+class SemicolonDialect(csv.excel):
+    # Excel's CSV where the decimal separator is a comma
+    delimiter = ";"
+
+# Accepted header names for each form field (lowercased, spaces removed)
+COLUMNS = {
+    "oldprice": ("oldprice", "old_price", "old", "price", "regularprice"),
+    "newprice": ("newprice", "new_price", "new", "saleprice"),
+    "discount": ("discount", "discount%", "percent", "off"),
+    "printqty": ("printqty", "qty", "quantity", "count"),
+    "barcode": ("barcode", "ean", "ean13", "gtin", "upc"),
+}
+# Column order when the file has no header row
+POSITIONAL = ("oldprice", "discount", "printqty")
+
+
+# ---------------------------------------
+# MARK: READERS
+# ---------------------------------------
+def csv_encoding(path: str) -> str:
+    """"utf-8-sig" if the whole file is valid UTF-8, else CSV_FALLBACK_ENCODING.
+
+    Checked up front in blocks, so a bad byte deep in the file does not
+    fail the import after rows were already printed.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        try:
+            for block in iter(lambda: f.read(64 * 1024), b""):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return CSV_FALLBACK_ENCODING
+    return "utf-8-sig"
+
+def cell_text(cell) -> str:
+    """Text for an .xlsx cell. Percent-formatted cells hold fractions
+    (20% is stored as 0.2) and come back as "20%"."""
+    value = cell.value
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and "%" in (cell.number_format or ""):
+        return f"{(to_decimal(value) * 100).normalize():f}%"
+    return str(value)
+
+def csv_dialect(sample: str):
+    """Dialect of a CSV file from its first block.
+
+    ";" wins when every complete line has one: with decimal commas
+    ("19,90;20") the sniffer would otherwise split on ",".
+    """
+    lines = sample.splitlines()
+    if len(sample) >= 4096 and len(lines) > 1:
+        # The last line of a full block may be cut off
+        lines = lines[:-1]
+    lines = [line for line in lines if line.strip()]
+    if lines and all(";" in line for line in lines):
+        return SemicolonDialect
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        return csv.excel
+
+def iter_rows(path: str, filename: str):
+    """Yield the rows of a CSV or XLSX file one at a time, as lists of strings."""
+    if filename.lower().endswith(".xlsx"):
+        if load_workbook is None:
+            raise ValueError("Reading .xlsx files needs openpyxl (pip install openpyxl).")
+        # read_only streams rows from the sheet XML instead of loading it all
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows():
+                yield [cell_text(cell) for cell in row]
+        finally:
+            workbook.close()
+    else:
+        with open(path, "r", encoding=csv_encoding(path), newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            yield from csv.reader(f, csv_dialect(sample))
+
+def header_map(row: list):
+    """Column index per form field if `row` is a header row, else None."""
+    names = [str(cell).strip().lower().replace(" ", "") for cell in row]
+    mapping = {}
+    for field, aliases in COLUMNS.items():
+        for i, name in enumerate(names):
+            if name in aliases:
+                mapping[field] = i
+                break
+    return mapping if "oldprice" in mapping or "newprice" in mapping else None
+
+def discount_factor(value: str) -> str:
+    """Price multiplier the web form uses ("0.8") from "20", "20%" or "0.8".
+
+    An empty or zero discount means no discount.
+    """
+    value = value.strip()
+    if not value:
+        return ""
+    percent = value.endswith("%")
+    number = to_decimal(value.rstrip("%"))
+    if number == 0:
+        return ""
+    if percent or number > 1:
+        number = 1 - number / 100
+    if not 0 < number <= 1:
+        raise ValueError(f"discount out of range: {value}")
+    return "" if number == 1 else f"{number.normalize():f}"
+
+def row_to_form(row: list, mapping: dict) -> dict:
+    """Web form fields for one price-list row."""
+    cell = lambda field: str(row[mapping[field]]).strip() if field in mapping and mapping[field] < len(row) else ""
+    return {
+        "oldprice": cell("oldprice").replace(",", "."),
+        "newprice": cell("newprice").replace(",", "."),
+        "discount": discount_factor(cell("discount")),
+        "printqty": cell("printqty") or "1",
+        "barcode": cell("barcode"),
+    }
+
+
+# ---------------------------------------
+# MARK: IMPORT JOB
+# ---------------------------------------
+class ImportJob:
+    """Prints a price list in the background, one bounded chunk at a time.
+
+    `make_label(form, barcode) -> (zpl, formats, qty)` turns one row
+    (as web form fields) into a print-ready label, or returns None for an
+    empty row. `barcode` is the row's barcode as returned by
+    parse_barcodes (None without one); barcodes are checked for a block
+    of rows at a time rather than row by row. `submit(zpl, description, formats, labels) -> PrintJob`
+    queues a chunk. At most `max_inflight` chunks are waiting at the
+    printer, so memory stays flat however long the file is. `cancel()`
+    stops reading; chunks already queued still print.
+
+    Status is "running" until every queued chunk has finished, then
+    "done" or "failed" (a chunk failed to print); "cancelled" is set as
+    soon as reading stops.
+    """
+    def __init__(self, path: str, filename: str, make_label, submit,
+                 chunk_labels: int = CHUNK_LABELS, max_inflight: int = MAX_INFLIGHT_CHUNKS):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.filename = filename
+        self.status = "running"
+        self.error = None
+        self.rows = 0
+        self.labels = 0
+        self.printed = 0
+        self.chunks = 0
+        self.skipped = 0
+        self.row_errors = []
+        self.job_ids = []
+        self.created = time.time()
+        self.finished = None
+        self._make_label = make_label
+        self._submit = submit
+        self._chunk_labels = chunk_labels
+        self._max_inflight = max_inflight
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"import-{self.id[:8]}")
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "error": self.error,
+            "rows": self.rows,
+            "labels": self.labels,
+            "printed": self.printed,
+            "chunks": self.chunks,
+            "skipped": self.skipped,
+            "row_errors": list(self.row_errors),
+            "job_ids": list(self.job_ids),
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+    def _run(self):
+        inflight = []
+        try:
+            chunk, chunk_labels, formats = [], 0, set()
+            for index, form, barcode in self._forms():
+                if self._cancel.is_set():
+                    break
+                try:
+                    label = self._make_label(form, barcode)
+                except ValueError as e:
+                    self._row_error(index, str(e))
+                    continue
+                if label is None:
+                    self.skipped += 1
+                    continue
+
+                zpl, label_formats, qty = label
+                chunk.append(zpl)
+                chunk_labels += qty
+                formats.update(label_formats)
+                if chunk_labels >= self._chunk_labels:
+                    self._send(chunk, chunk_labels, formats, inflight)
+                    chunk, chunk_labels, formats = [], 0, set()
+
+            if chunk and not self._cancel.is_set():
+                self._send(chunk, chunk_labels, formats, inflight)
+            for job in inflight:
+                while not job.done.wait(0.5) and not self._cancel.is_set():
+                    pass
+                if job.done.is_set():
+                    self._settle(job)
+            if self._cancel.is_set():
+                self.status = "cancelled"
+            elif self.error:
+                self.status = "failed"
+            else:
+                self.status = "done"
+        except Exception as e:
+            self.status, self.error = "failed", str(e)
+        finally:
+            self.finished = time.time()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _forms(self):
+        # (row number, form fields, parsed barcode) for every data row
+        mapping = None
+        block = []
+        for index, row in enumerate(iter_rows(self.path, self.filename), start=1):
+            if self._cancel.is_set():
+                return
+            if not any(str(cell).strip() for cell in row):
+                continue
+            if mapping is None:
+                mapping = header_map(row)
+                if mapping is not None:
+                    continue
+                mapping = {field: i for i, field in enumerate(POSITIONAL)}
+
+            self.rows += 1
+            try:
+                block.append((index, row_to_form(row, mapping)))
+            except ValueError as e:
+                self._row_error(index, str(e))
+                continue
+            if len(block) >= BLOCK_ROWS:
+                yield from self._with_barcodes(block)
+                block = []
+        yield from self._with_barcodes(block)
+
+    @staticmethod
+    def _with_barcodes(block: list):
+        # One parse_barcodes call for the block's barcode column
+        coded = [i for i, (_, form) in enumerate(block) if form["barcode"]]
+        parsed = dict(zip(coded, parse_barcodes([block[i][1]["barcode"] for i in coded])))
+        for i, (index, form) in enumerate(block):
+            yield index, form, parsed.get(i)
+
+    def _send(self, chunk: list, labels: int, formats: set, inflight: list):
+        # Back-pressure: wait for the oldest chunk before queueing another
+        while len(inflight) >= self._max_inflight and not self._cancel.is_set():
+            if inflight[0].done.wait(0.5):
+                self._settle(inflight.pop(0))
+        if self._cancel.is_set():
+            return
+        self.chunks += 1
+        job = self._submit(b"".join(chunk), f"import {self.filename}: chunk {self.chunks} ({labels} labels)", sorted(formats), labels)
+        inflight.append(job)
+        self.job_ids.append(job.id)
+        self.labels += labels
+
+    def _settle(self, job):
+        if job.status == "sent":
+            self.printed += job.labels
+        elif self.error is None:
+            self.error = f"Chunk failed: {job.error}"
+
+    def _row_error(self, index: int, message: str):
+        # Errors arrive out of order (barcodes are checked per block), so
+        # keep the first MAX_ROW_ERRORS by row number
+        self.skipped += 1
+        self.row_errors.append({ "row": index, "message": message })
+        self.row_errors.sort(key=lambda error: error["row"])
+        del self.row_errors[MAX_ROW_ERRORS:]
@@ -0,0 +1,272 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+MAX_TRACKED_JOBS = 1000
+MAX_COALESCE_BYTES = 64 * 1024
+BULK_SLICE_BYTES = 8 * 1024
+MAX_HOLD_SECONDS = 60.0
+HOLD_CHECK_INTERVAL = 1.0
+
+
+# ---------------------------------------
+# MARK: JOB
+# ---------------------------------------
+class PrintJob:
+    """A unit of ZPL waiting for (or done with) its printer.
+
+    Status moves from "queued" to either "sent" or "failed", passing through
+    "held" while its printer reports it cannot print. `lane` is
+    "interactive" (a person is waiting) or "bulk" (batches, imports).
+    """
+    def __init__(self, target: tuple = None, zpl: bytes = b"", description: str = "", formats=(), labels: int = 0, spec: dict = None,
+                 lane: str = "interactive"):
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.zpl = zpl
+        self.formats = tuple(formats)
+        self.labels = labels
+        self.spec = spec
+        self.lane = lane
+        self.description = description
+        self.status = "queued"
+        self.error = None
+        self.cause = None
+        self.created = time.time()
+        self.finished = None
+        self.done = threading.Event()
+        self.callbacks = []
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "description": self.description,
+            "error": self.error,
+            "bytes": len(self.zpl),
+            "labels": self.labels,
+            "lane": self.lane,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+# ---------------------------------------
+# MARK: LANES
+# ---------------------------------------
+class LaneQueue:
+    """Waiting jobs for one printer, in two FIFO lanes.
+
+    `get()` always returns the oldest interactive job before any bulk job.
+    """
+    def __init__(self):
+        self._lanes = {"interactive": deque(), "bulk": deque()}
+        self._ready = threading.Condition()
+
+    def put(self, job: PrintJob):
+        with self._ready:
+            self._lanes["bulk" if job.lane == "bulk" else "interactive"].append(job)
+            self._ready.notify()
+
+    def get(self) -> PrintJob:
+        with self._ready:
+            while not self._lanes["interactive"] and not self._lanes["bulk"]:
+                self._ready.wait()
+            return self._pop()
+
+    def get_nowait(self, lane: str = None):
+        """Next job (from `lane` only, if given), or None if there is none."""
+        with self._ready:
+            if lane is not None:
+                return self._lanes[lane].popleft() if self._lanes[lane] else None
+            return self._pop()
+
+    def qsize(self) -> int:
+        with self._ready:
+            return len(self._lanes["interactive"]) + len(self._lanes["bulk"])
+
+    def _pop(self):
+        for lane in ("interactive", "bulk"):
+            if self._lanes[lane]:
+                return self._lanes[lane].popleft()
+        return None
+
+
+def split_formats(zpl: bytes, max_bytes: int = BULK_SLICE_BYTES) -> list:
+    """Split a ZPL stream into slices of whole ^XA...^XZ formats."""
+    if len(zpl) <= max_bytes:
+        return [zpl]
+    slices = []
+    start = 0
+    while start < len(zpl):
+        end = zpl.rfind(b"^XZ", start, start + max_bytes)
+        if end == -1:
+            end = zpl.find(b"^XZ", start + max_bytes)
+        end = len(zpl) if end == -1 else end + 3
+        slices.append(zpl[start:end])
+        start = end
+    return slices
+
+
+# ---------------------------------------
+# MARK: QUEUE
+# ---------------------------------------
+class JobQueue:
+    """Print job queue with one writer thread per printer target.
+
+    `sender(target, zpl, formats)` performs the actual printer I/O and
+    raises on failure; `formats` are the stored formats the ZPL recalls.
+    Jobs for the same target are written strictly in order, so concurrent
+    requests never compete for the same printer connection. Jobs that are
+    already waiting when the writer wakes up are coalesced into one write.
+    Interactive jobs go ahead of bulk ones, and bulk jobs are written in
+    slices of whole formats so waiting interactive jobs are slipped in
+    between slices instead of waiting for the whole batch.
+    `on_submitted(job)` is called for every job as it is queued and
+    `on_finished(job)` from the writer thread after every job.
+    `gate(target)` returns a reason while the printer cannot take data
+    (paper out, paused, ...); jobs are then held for up to `max_hold`
+    seconds before they fail with that reason.
+    """
+    def __init__(self, sender, on_finished=None, gate=None, max_hold: float = MAX_HOLD_SECONDS, max_tracked: int = MAX_TRACKED_JOBS,
+                 on_submitted=None):
+        self._sender = sender
+        self._on_submitted = on_submitted
+        self._on_finished = on_finished
+        self._gate = gate
+        self.max_hold = max_hold
+        self._max_tracked = max_tracked
+        self._queues = {}
+        self._pending = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, target: tuple, zpl: bytes, description: str = "", formats=(), labels: int = 0, spec: dict = None,
+               lane: str = "interactive") -> PrintJob:
+        job = self.track(PrintJob(target, zpl, description, formats, labels, spec, lane))
+        if self._on_submitted:
+            self._on_submitted(job)
+        with self._lock:
+            self._pending[target] = self._pending.get(target, 0) + 1
+            q = self._queues.get(target)
+            if q is None:
+                q = LaneQueue()
+                self._queues[target] = q
+                threading.Thread(target=self._worker, args=(target, q), daemon=True, name=f"printer-{target}").start()
+        q.put(job)
+        return job
+
+    def track(self, job: PrintJob) -> PrintJob:
+        """Register a job created outside submit() so it can be looked up.
+
+        Used for per-request handles whose printing happens as part of
+        another (merged) job; finish them with complete().
+        """
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._max_tracked:
+                self._jobs.popitem(last=False)
+        return job
+
+    def complete(self, job: PrintJob, status: str, error: str = None, notify: bool = True):
+        """Mark a job finished and run its callbacks (and on_finished if notify)."""
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+        job.done.set()
+        if notify and self._on_finished:
+            try:
+                self._on_finished(job)
+            except Exception as e:
+                print(f"Job callback failed for {job.id}: {e}")
+        for callback in job.callbacks:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"Job callback failed for {job.id}: {e}")
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self, target: tuple = None) -> int:
+        """Number of jobs waiting, for one target or across all printers."""
+        with self._lock:
+            if target is not None:
+                q = self._queues.get(target)
+                return q.qsize() if q else 0
+            return sum(q.qsize() for q in self._queues.values())
+
+    def pending(self, target: tuple) -> int:
+        """Unfinished jobs (waiting or being written) for one target."""
+        with self._lock:
+            return self._pending.get(target, 0)
+
+    def _hold(self, target: tuple, jobs: list):
+        # Wait while the gate reports the printer as not ready; returns the
+        # reason if it is still not ready after max_hold seconds
+        if self._gate is None:
+            return None
+        deadline = time.monotonic() + self.max_hold
+        reason = self._gate(target)
+        while reason and time.monotonic() < deadline:
+            for job in jobs:
+                job.status = "held"
+                job.error = reason
+            time.sleep(HOLD_CHECK_INTERVAL)
+            reason = self._gate(target)
+        return reason
+
+    def _worker(self, target: tuple, q: LaneQueue):
+        while True:
+            job = q.get()
+            if job.lane == "bulk":
+                self._write_bulk(target, job, q)
+            else:
+                self._write_interactive(target, job, q)
+
+    def _write_interactive(self, target: tuple, first: PrintJob, q: LaneQueue):
+        # Coalesce the interactive jobs that are already waiting into one write
+        jobs = [first]
+        size = len(first.zpl)
+        while size < MAX_COALESCE_BYTES:
+            job = q.get_nowait("interactive")
+            if job is None:
+                break
+            jobs.append(job)
+            size += len(job.zpl)
+        self._write(target, jobs, [b"".join(job.zpl for job in jobs)])
+
+    def _write_bulk(self, target: tuple, job: PrintJob, q: LaneQueue):
+        # Interactive jobs that arrive meanwhile are written between slices
+        def between_slices():
+            waiting = q.get_nowait("interactive")
+            if waiting is not None:
+                self._write_interactive(target, waiting, q)
+        self._write(target, [job], split_formats(job.zpl), between_slices)
+
+    def _write(self, target: tuple, jobs: list, slices: list, between_slices=None):
+        formats = list(dict.fromkeys(fmt for job in jobs for fmt in job.formats))
+        reason = self._hold(target, jobs)
+        cause = None
+        if reason:
+            status, error, cause = "failed", f"Printer not ready: {reason}", "not_ready"
+        else:
+            try:
+                for i, data in enumerate(slices):
+                    if i and between_slices is not None:
+                        between_slices()
+                    self._sender(target, data, formats)
+                status, error = "sent", None
+            except Exception as e:
+                status, error, cause = "failed", str(e), type(e).__name__
+
+        with self._lock:
+            self._pending[target] -= len(jobs)
+        for job in jobs:
+            job.cause = cause
+            self.complete(job, status, error)
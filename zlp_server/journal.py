@@ -0,0 +1,131 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import hashlib
+import json
+import sqlite3
+import time
+from zlp_server.batchwriter import BatchWriter, connect_sqlite
+
+FLUSH_INTERVAL = 0.2
+FLUSH_ROWS = 500
+RETENTION_DAYS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    target TEXT NOT NULL,
+    description TEXT NOT NULL,
+    spec TEXT,
+    zpl BLOB NOT NULL,
+    zpl_hash TEXT NOT NULL,
+    formats TEXT NOT NULL,
+    labels INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    replaced_by TEXT,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+"""
+
+
+# ---------------------------------------
+# MARK: JOURNAL
+# ---------------------------------------
+class JobJournal:
+    """Durable record of every print job in a SQLite database (WAL mode).
+
+    `record(job)` and `finish(job)` only enqueue; a background thread writes
+    batches in a single transaction when `flush_rows` changes are waiting or
+    `flush_interval` seconds have passed, so the print path never waits on
+    the disk. Jobs still "queued" when the server stopped are returned by
+    `unfinished()` so they can be replayed. A job the printer had already
+    received when the server was killed is printed again (at least once).
+    Only the names of the stored formats a job recalls are kept; their
+    downloads are looked up in the current settings at replay.
+    """
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, flush_rows: int = FLUSH_ROWS,
+                 retention_days: float = RETENTION_DAYS):
+        self.path = path
+        with connect_sqlite(path) as db:
+            db.executescript(SCHEMA)
+            if retention_days > 0:
+                db.execute("DELETE FROM jobs WHERE status != 'queued' AND created < ?",
+                    (time.time() - retention_days * 86400,))
+        self._writer = BatchWriter(self._flush, flush_interval, flush_rows, "job-journal", connect=lambda: connect_sqlite(path))
+
+    def record(self, job):
+        if job.zpl:
+            self._writer.put(("insert", job))
+
+    def finish(self, job):
+        if job.zpl:
+            self._writer.put(("update", (job.status, job.error, job.finished, job.id)))
+
+    def mark_replayed(self, job_id: str, replaced_by: str):
+        self._writer.put(("replayed", (replaced_by, job_id)))
+
+    def unfinished(self) -> list:
+        """Jobs that never finished, oldest first, with the names of their stored formats."""
+        with connect_sqlite(self.path) as db:
+            rows = db.execute("SELECT id, target, description, spec, zpl, formats, labels, created "
+                "FROM jobs WHERE status = 'queued' ORDER BY created").fetchall()
+        return [{
+            "id": row[0],
+            "target": tuple(json.loads(row[1])),
+            "description": row[2],
+            "spec": json.loads(row[3]) if row[3] else None,
+            "zpl": bytes(row[4]),
+            # Older rows stored [name, download] pairs
+            "formats": [name if isinstance(name, str) else name[0] for name in json.loads(row[5])],
+            "labels": row[6],
+            "created": row[7],
+        } for row in rows]
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        self._writer.close()
+
+    def _flush(self, db: sqlite3.Connection, batch: list):
+        # Most jobs finish within one batch: fold their final status into the
+        # insert so each job costs a single row write
+        inserts = {}
+        updates = []
+        replayed = []
+        for kind, data in batch:
+            if kind == "insert":
+                inserts[data.id] = self._row(data)
+            elif kind == "update" and data[3] in inserts:
+                inserts[data[3]][8:10] = data[:2]
+                inserts[data[3]][11] = data[2]
+            elif kind == "update":
+                updates.append(data)
+            elif kind == "replayed":
+                replayed.append(data)
+        try:
+            with db:
+                db.executemany("INSERT OR REPLACE INTO jobs (id, target, description, spec, zpl, zpl_hash, formats, labels, status, error, created, finished) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", inserts.values())
+                db.executemany("UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?", updates)
+                db.executemany("UPDATE jobs SET status = 'replayed', replaced_by = ? WHERE id = ?", replayed)
+        except sqlite3.Error as e:
+            print(f"Failed to write job journal {self.path}: {e}")
+
+    def _row(self, job) -> list:
+        return [
+            job.id,
+            json.dumps(list(job.target)),
+            job.description,
+            json.dumps(job.spec, ensure_ascii=False) if job.spec else None,
+            job.zpl,
+            hashlib.sha256(job.zpl).hexdigest(),
+            json.dumps([name for name, _ in job.formats]),
+            job.labels,
+            "queued",
+            None,
+            job.created,
+            None,
+        ]
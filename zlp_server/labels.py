@@ -0,0 +1,186 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import re
+
+_FIELD = re.compile(r"\{(\w+)\}")
+LABEL_TYPE_ERROR = "label_type must be 'normal', 'sale', 'ean13' or 'code128'"
+
+# ---------------------------------------
+# MARK: LAYOUTS
+# ---------------------------------------
+# Layouts are written readable (one command per line, `;` comments) and
+# compiled once at import into minimal byte segments. Only the `{field}`
+# placeholders are spliced in per label.
+NORMAL_LAYOUT = """
+^XA
+^CI28
+^PW248
+^LL176
+^LH0,0
+^FO10,70^FB248,1,0,C^A0N,40,40^FD{top_text}^FS
+^PQ{qty}
+^XZ
+"""
+
+SALE_LAYOUT = """
+^XA
+^CI28
+^PW248
+^LL176
+^LH0,0
+^FO10,30^FB248,1,0,C^A0N,40,40^FD{top_text}^FS       ; Top price (centered)
+^FO10,45^GB228,4,4,B,0^FS                           ; Strikethrough line
+^FO10,67^FB248,1,0,C^A0N,20,20^FD{discount}^FS      ; Percentage
+^FO10,90^FB248,1,0,C^A0N,40,40^FD{bottom_text}^FS   ; Bottom price (centered)
+^PQ{qty}
+^XZ
+"""
+
+# Shelf labels: price above a product barcode. ^BE takes the first 12
+# digits and prints its own check digit; Code 128 uses automatic subsets
+EAN13_LAYOUT = """
+^XA
+^CI28
+^PW248
+^LL176
+^LH0,0
+^FO10,12^FB248,1,0,C^A0N,40,40^FD{top_text}^FS      ; Price (centered)
+^FO39,64^BY2^BEN,70,Y,N^FD{barcode}^FS              ; EAN-13, digits below
+^PQ{qty}
+^XZ
+"""
+
+CODE128_LAYOUT = """
+^XA
+^CI28
+^PW248
+^LL176
+^LH0,0
+^FO10,12^FB248,1,0,C^A0N,40,40^FD{top_text}^FS      ; Price (centered)
+^FO10,64^BY2^BCN,70,Y,N,N,A^FD{barcode}^FS          ; Code 128, text below
+^PQ{qty}
+^XZ
+"""
+
+
+# ---------------------------------------
+# MARK: COMPILER
+# ---------------------------------------
+def minify_layout(layout: str) -> str:
+    """Strip indentation, blank lines and `;` comments from a layout."""
+    return "".join(line.split(";", 1)[0].strip() for line in layout.splitlines())
+
+def compile_layout(layout: str) -> tuple:
+    """Turn a layout into a bytes format string plus the ordered field
+    names it expects."""
+    zpl = minify_layout(layout).replace("%", "%%")
+    fields = tuple(_FIELD.findall(zpl))
+    return _FIELD.sub(lambda m: "%d" if m.group(1) == "qty" else "%b", zpl).encode("utf-8"), fields
+
+def add_fields(zpl, fields):
+    """Insert extra fields (graphics) ahead of a format's first ^FO, so the
+    text prints on top of them. Works on layouts (str) and ZPL (bytes)."""
+    marker = "^FO" if isinstance(zpl, str) else b"^FO"
+    return zpl.replace(marker, fields + marker, 1)
+
+LAYOUTS = {
+    "normal": NORMAL_LAYOUT,
+    "sale": SALE_LAYOUT,
+    "ean13": EAN13_LAYOUT,
+    "code128": CODE128_LAYOUT,
+}
+COMPILED_LAYOUTS = {
+    "normal": compile_layout(NORMAL_LAYOUT),
+    "sale": compile_layout(SALE_LAYOUT),
+    "ean13": compile_layout(EAN13_LAYOUT),
+    "code128": compile_layout(CODE128_LAYOUT),
+}
+NORMAL_ZPL = COMPILED_LAYOUTS["normal"][0]
+SALE_ZPL = COMPILED_LAYOUTS["sale"][0]
+EAN13_ZPL = COMPILED_LAYOUTS["ean13"][0]
+CODE128_ZPL = COMPILED_LAYOUTS["code128"][0]
+
+
+def compile_stored_format(name: str, layout: str) -> tuple:
+    """Compile a layout into a printer-resident format.
+
+    Returns (name, download, recall, fields): `download` is the ^DF job that
+    stores the layout in printer RAM with every ^FD{field} turned into a ^FN
+    slot, and `recall` is a bytes format string for the ^XF job that fills
+    those slots. Quantity stays in the recall so one stored format serves
+    every ^PQ.
+    """
+    zpl = minify_layout(layout).replace("^PQ{qty}", "")
+    fields = tuple(_FIELD.findall(zpl))
+    for number, field in enumerate(fields, 1):
+        zpl = zpl.replace(f"^FD{{{field}}}", f"^FN{number}")
+    download = zpl.replace("^XA", f"^XA^DF{name}^FS", 1).encode("utf-8")
+    slots = "".join(f"^FN{number}^FD%b^FS" for number in range(1, len(fields) + 1))
+    recall = f"^XA^XF{name}^FS^CI28{slots}^PQ%d^XZ".encode("utf-8")
+    return name, download, recall, fields
+
+STORED_FORMATS = {
+    "normal": compile_stored_format("R:ZLPNORM.ZPL", NORMAL_LAYOUT),
+    "sale": compile_stored_format("R:ZLPSALE.ZPL", SALE_LAYOUT),
+    "ean13": compile_stored_format("R:ZLPEAN.ZPL", EAN13_LAYOUT),
+    "code128": compile_stored_format("R:ZLP128.ZPL", CODE128_LAYOUT),
+}
+
+
+# ---------------------------------------
+# MARK: LABELS
+# ---------------------------------------
+def check_text(*texts):
+    # Field text is spliced into ^FD...^FS as is: a ^ would end the field
+    # (a ^XZ ends the whole format) and a ~ command runs as soon as the
+    # printer receives it (~JA cancels all jobs), so neither is allowed
+    for text in texts:
+        if "^" in text or "~" in text:
+            raise ValueError(f"Label text cannot contain ^ or ~: {text!r}")
+
+def generate_label(label_type: str, top_text: str, qty: int = 1, bottom_text: str = "", discount: str = "",
+                   barcode: str = "") -> bytes:
+    # Generate ZPL code for label; fields are spliced in layout order
+    kind = label_type.lower()
+    check_text(top_text, bottom_text, discount, barcode)
+
+    # Normal label: top_text, qty
+    if kind == "normal":
+        return NORMAL_ZPL % (top_text.encode("utf-8"), int(qty))
+
+    # Sale label: top_text, discount, bottom_text, qty
+    elif kind == "sale":
+        return SALE_ZPL % (top_text.encode("utf-8"), discount.encode("utf-8"), bottom_text.encode("utf-8"), int(qty))
+
+    # Barcode labels: top_text, barcode (validated by zlp_server.barcodes), qty
+    elif kind == "ean13":
+        return EAN13_ZPL % (top_text.encode("utf-8"), barcode.encode("ascii"), int(qty))
+    elif kind == "code128":
+        return CODE128_ZPL % (top_text.encode("utf-8"), barcode.encode("ascii"), int(qty))
+
+    # Invalid label type
+    raise ValueError(LABEL_TYPE_ERROR)
+
+def graphic_formats(label_type: str, graphics: list) -> list:
+    # (name, download) pairs for a label type drawn with graphics, given as
+    # (Graphic, x, y): each ~DG download, then the stored format placing
+    # them with ^IM. The format keeps its name, so recalls do not change
+    fmt = STORED_FORMATS.get(label_type.lower())
+    if fmt is None:
+        raise ValueError(LABEL_TYPE_ERROR)
+    if not graphics:
+        return [(fmt[0], fmt[1])]
+    recalls = "".join(graphic.recall(x, y).decode("ascii") for graphic, x, y in graphics)
+    name, download, _, _ = compile_stored_format(fmt[0], add_fields(LAYOUTS[label_type.lower()], recalls))
+    return [graphic.download() for graphic, _, _ in graphics] + [(name, download)]
+
+def generate_recall(label_type: str, top_text: str, qty: int = 1, bottom_text: str = "", discount: str = "",
+                    barcode: str = "") -> bytes:
+    # Generate a field-only ^XF job for a format stored with ^DF
+    fmt = STORED_FORMATS.get(label_type.lower())
+    if fmt is None:
+        raise ValueError(LABEL_TYPE_ERROR)
+    check_text(top_text, bottom_text, discount, barcode)
+    values = {"top_text": top_text, "bottom_text": bottom_text, "discount": discount, "barcode": barcode}
+    return fmt[2] % (*[values[field].encode("utf-8") for field in fmt[3]], int(qty))
@@ -0,0 +1,123 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# ---------------------------------------
+# MARK: METRICS
+# ---------------------------------------
+class Counter:
+    """Monotonic counter with optional labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items]
+
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read=None):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self) -> list:
+        return [f"{self.name} {self.read() if self.read else 0}"]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        lines = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_text = _labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+# ---------------------------------------
+# MARK: REGISTRY
+# ---------------------------------------
+REQUESTS = Counter("zlp_print_requests_total", "Print requests by label type.", ("label_type",))
+LABELS_PRINTED = Counter("zlp_labels_printed_total", "Labels sent to printers (sum of qty).", ("printer",))
+BYTES_SENT = Counter("zlp_bytes_sent_total", "ZPL bytes sent per printer.", ("printer",))
+FAILURES = Counter("zlp_failures_total", "Failed print requests and jobs by cause.", ("cause",))
+CONNECT_SECONDS = Histogram("zlp_tcp_connect_seconds", "TCP connect time to network printers.", ("printer",))
+SEND_SECONDS = Histogram("zlp_send_seconds", "Time to hand a job's bytes to the printer.", ("printer",))
+QUEUE_DEPTH = Gauge("zlp_queue_depth", "Print jobs waiting across all printers.")
+PREVIEWS = Counter("zlp_previews_total", "Label previews served, by render cache result.", ("cache",))
+
+REGISTRY = [REQUESTS, LABELS_PRINTED, BYTES_SENT, FAILURES, CONNECT_SECONDS, SEND_SECONDS, QUEUE_DEPTH, PREVIEWS]
+
+
+def printer_name(target: tuple) -> str:
+    # Short label value for a printer target
+    if target and target[0] == "NET/TCP":
+        return f"{target[1]}:{target[2]}"
+    return ":".join(str(part) for part in target or ())
+
+def render_metrics() -> str:
+    """Prometheus text exposition (version 0.0.4) of every registered metric."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
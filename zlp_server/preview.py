@@ -0,0 +1,195 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import hashlib
+import io
+import re
+import threading
+from collections import OrderedDict
+from zlp_server.graphics import decode
+from zlp_server.barcodes import code128_modules, ean13_check_digit
+
+try:
+    # Optional: only needed for label previews
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+CACHE_SIZE = 256
+LABEL_WIDTH = 248
+LABEL_HEIGHT = 176
+
+# Scalable fonts closest to the printer's font 0, first one found wins
+FONT_FILES = ("arialnb.ttf", "arialbd.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "arial.ttf")
+
+_COMMAND = re.compile(rb"[\^~]([A-Z@][A-Z0-9@]?)([^\^~]*)")
+
+
+def available() -> bool:
+    return Image is not None
+
+
+# ---------------------------------------
+# MARK: RASTERIZER
+# ---------------------------------------
+_fonts = {}
+
+def _font(height: int):
+    font = _fonts.get(height)
+    if font is None:
+        for name in FONT_FILES:
+            try:
+                font = ImageFont.truetype(name, height)
+                break
+            except OSError:
+                continue
+        else:
+            font = ImageFont.load_default(height)
+        _fonts[height] = font
+    return font
+
+def _numbers(params: bytes, defaults: tuple) -> list:
+    values = list(defaults)
+    for i, part in enumerate(params.split(b",")[:len(values)]):
+        part = part.strip()
+        if part.lstrip(b"-").isdigit():
+            values[i] = int(part)
+    return values
+
+def render_png(zpl: bytes) -> bytes:
+    """Rasterize one label format to a 1-bit PNG at printer resolution.
+
+    Covers the commands the label layouts use: ^PW/^LL (size), ^LH, ^FO,
+    ^FB (single-line block with L/C/R justification), ^A0 (scalable font,
+    drawn with the nearest TrueType font), ^FD...^FS text, ^GB boxes and
+    ^GFA graphics (plain hex, ACS or Z64). ^BE / ^BC barcodes are drawn as
+    plain bars of their real size with the text line below; they show the
+    layout but do not scan.
+    Anything else, such as ^PQ or ^CI, does not change the image.
+    """
+    if Image is None:
+        raise RuntimeError("Label previews need Pillow (pip install pillow).")
+    commands = [(name.decode("ascii"), params) for name, params in _COMMAND.findall(zpl)]
+    width, height = LABEL_WIDTH, LABEL_HEIGHT
+    for name, params in commands:
+        if name == "PW":
+            width = _numbers(params, (width,))[0]
+        elif name == "LL":
+            height = _numbers(params, (height,))[0]
+
+    image = Image.new("1", (width, height), 1)
+    draw = ImageDraw.Draw(image)
+    home = (0, 0)
+    origin = (0, 0)
+    block = None
+    font_height = 30
+    module = 2
+    barcode = None
+    for name, params in commands:
+        if name == "LH":
+            home = tuple(_numbers(params, (0, 0)))
+        elif name == "FO":
+            x, y = _numbers(params, (0, 0))
+            origin = (home[0] + x, home[1] + y)
+        elif name == "FB":
+            block_width, _, _ = _numbers(params, (0, 1, 0))
+            justify = params.split(b",")[3:4] or [b"L"]
+            block = (block_width, justify[0].strip()[:1] or b"L")
+        elif name == "A0":
+            # ^A0o,h,w: orientation, then character height in dots
+            _, font_height, _ = _numbers(params, (0, font_height, 0))
+        elif name == "BY":
+            module = _numbers(params, (module,))[0]
+        elif name in ("BE", "BC"):
+            # ^BEo,h,f / ^BCo,h,f: orientation, bar height, text line
+            _, bar_height, _ = _numbers(params, (0, 10 * module, 0))
+            interpretation = (params.split(b",")[2:3] or [b"Y"])[0].strip() != b"N"
+            barcode = (name, bar_height, interpretation)
+        elif name == "FD" and barcode is not None:
+            text = params.decode("ascii", "replace")
+            kind, bar_height, interpretation = barcode
+            if kind == "BE":
+                text = text[:12] + str(ean13_check_digit(text))
+                bars = 95 * module
+            else:
+                bars = code128_modules(text) * module
+            x, y = origin
+            for bar in range(x, x + bars, module * 2):
+                draw.rectangle((bar, y, bar + module - 1, y + bar_height - 1), fill=0)
+            if interpretation:
+                font = _font(9 * module)
+                draw.text((x + (bars - draw.textlength(text, font=font)) / 2, y + bar_height + 2), text, font=font, fill=0)
+        elif name == "FD":
+            text = params.decode("utf-8", "replace")
+            font = _font(font_height)
+            x = origin[0]
+            if block is not None:
+                text_width = draw.textlength(text, font=font)
+                if block[1] == b"C":
+                    x += (block[0] - text_width) / 2
+                elif block[1] == b"R":
+                    x += block[0] - text_width
+            draw.text((x, origin[1]), text, font=font, fill=0)
+        elif name == "GB":
+            box_width, box_height, thickness = _numbers(params, (1, 1, 1))
+            box_width, box_height = max(box_width, thickness), max(box_height, thickness)
+            x, y = origin
+            if thickness * 2 >= min(box_width, box_height):
+                draw.rectangle((x, y, x + box_width - 1, y + box_height - 1), fill=0)
+            else:
+                draw.rectangle((x, y, x + box_width - 1, y + box_height - 1), outline=0, width=thickness)
+        elif name == "GF":
+            _, total, _, bytes_per_row, data = (params.split(b",", 4) + [b""] * 5)[:5]
+            total, bytes_per_row = int(total), int(bytes_per_row)
+            # Set bits are printed dots: paint black through the bitmap as a mask
+            mask = Image.frombytes("1", (bytes_per_row * 8, total // bytes_per_row), decode(data, total, bytes_per_row))
+            x, y = origin
+            image.paste(0, (x, y, x + mask.width, y + mask.height), mask)
+        elif name == "FS":
+            block = None
+            barcode = None
+
+    out = io.BytesIO()
+    image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+# ---------------------------------------
+# MARK: CACHE
+# ---------------------------------------
+class PreviewCache:
+    """Bounded LRU of rendered previews keyed by the ZPL's hash.
+
+    `get(zpl)` returns (png, etag, hit). Identical labels (the same price
+    previewed from every tablet, the suggestion buttons) are rasterized
+    once; later calls only hash the ZPL and look it up.
+    """
+    def __init__(self, max_entries: int = CACHE_SIZE, render=render_png):
+        self.max_entries = max_entries
+        self._render = render
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, zpl: bytes) -> tuple:
+        key = hashlib.sha1(zpl).hexdigest()
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                return png, key, True
+
+        # Render outside the lock; two threads may render the same label once each
+        png = self._render(zpl)
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return png, key, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
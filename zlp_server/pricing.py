@@ -0,0 +1,119 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR, ROUND_HALF_UP
+from functools import lru_cache
+
+CACHE_SIZE = 4096
+ONE = Decimal(1)
+# Larger inputs are typos; quantizing them could overflow the context precision
+MAX_VALUE = Decimal(10) ** 12
+
+# Rounding of computed (discounted) prices per currency:
+# - "quantum": smallest price step, rounded half up
+# - "ending": fixed ending (PLN x.90); the price is rounded down to the
+#   nearest such ending, so a sale price never exceeds its discount
+# Other currencies round to cents. Keys are upper-cased currency settings.
+RULES = {
+    "HUF": {"quantum": Decimal("1")},
+    "FT": {"quantum": Decimal("1")},
+    "CZK": {"quantum": Decimal("1")},
+    "KČ": {"quantum": Decimal("1")},
+    "PLN": {"quantum": Decimal("0.01"), "ending": Decimal("0.90")},
+    "ZŁ": {"quantum": Decimal("0.01"), "ending": Decimal("0.90")},
+}
+DEFAULT_RULE = {"quantum": Decimal("0.01")}
+
+
+# ---------------------------------------
+# MARK: ARITHMETIC
+# ---------------------------------------
+def to_decimal(value) -> Decimal:
+    """Exact Decimal for a price or discount from a form, JSON or a file.
+
+    Strings may use a decimal comma. Floats go through their shortest repr,
+    so 19.9 becomes Decimal("19.9"), not its binary approximation.
+    Raises ValueError for anything that is not a finite number below
+    MAX_VALUE.
+    """
+    if isinstance(value, Decimal):
+        number = value
+    else:
+        text = value if isinstance(value, str) else repr(value)
+        try:
+            number = Decimal(text.strip().replace(",", "."))
+        except InvalidOperation:
+            raise ValueError(f"invalid number: {value!r}") from None
+    if not number.is_finite():
+        raise ValueError(f"invalid number: {value!r}")
+    if abs(number) >= MAX_VALUE:
+        raise ValueError(f"number out of range: {value!r}")
+    return number
+
+def _quantize(value: Decimal, quantum: Decimal, rounding: str) -> Decimal:
+    # InvalidOperation is an ArithmeticError; callers expect ValueError
+    try:
+        return value.quantize(quantum, rounding)
+    except InvalidOperation:
+        raise ValueError(f"number out of range: {value}") from None
+
+def round_price(value, currency: str) -> Decimal:
+    """Round a computed price by the currency's rule."""
+    value = to_decimal(value)
+    rule = RULES.get(str(currency).upper(), DEFAULT_RULE)
+    ending = rule.get("ending")
+    if ending is not None and value >= ending:
+        return _quantize(value - ending, ONE, ROUND_FLOOR) + ending
+    return _quantize(value, rule["quantum"], ROUND_HALF_UP)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def sale_price(old, factor, currency: str) -> tuple:
+    """(discounted price, percent off) for `old` at multiplier `factor` ("0.8")."""
+    old, factor = to_decimal(old), to_decimal(factor)
+    percent = _quantize((ONE - factor) * 100, ONE, ROUND_HALF_UP)
+    return round_price(old * factor, currency), int(percent)
+
+
+# ---------------------------------------
+# MARK: SUGGESTIONS
+# ---------------------------------------
+def suggestion_values(kind: str) -> list:
+    """Rows of typical shelf prices for the price buttons of a market."""
+    if kind == "Poland":
+        return [[(i + offset) * 10 + Decimal("9.9") for offset in range(6)] for i in range(1, 103, 6)]
+    if kind == "Czech":
+        return [[Decimal((i + offset) * 100 + ending) for offset, ending in zip((0, 0, 1, 1, 2, 2), (49, 99) * 3)]
+                for i in range(2, 100, 3)]
+    if kind == "Hungary":
+        return [[Decimal((i + offset) * 1000 + ending) for offset, ending in zip((0, 0, 1, 1, 2, 2), (490, 990) * 3)]
+                for i in range(2, 100, 3)]
+    return []
+
+
+# ---------------------------------------
+# MARK: FORMATTING
+# ---------------------------------------
+def _format(value, show_decimals: bool, decimal_places: int) -> str:
+    quantum = ONE.scaleb(-int(decimal_places)) if show_decimals else ONE
+    # + 0 turns a rounded "-0" into "0"
+    return f"{_quantize(to_decimal(value), quantum, ROUND_HALF_UP) + 0:f}"
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_price(value, show_decimals: bool, decimal_places: int) -> str:
+    """Price as printed: `decimal_places` decimals, or whole units when
+    decimals are hidden. Halves round up, never to even.
+
+    Memoized on (value, settings): the same few prices are printed all day,
+    so most calls skip parsing and rounding entirely.
+    """
+    return _format(value, show_decimals, decimal_places)
+
+def format_prices(values, show_decimals: bool, decimal_places: int) -> list:
+    """Format a whole list (an import column, the suggestion grid) at once.
+
+    Each distinct value is formatted once. The request cache is bypassed, so
+    a long list does not evict the prices the tablets keep asking for.
+    """
+    values = list(values)
+    formatted = {value: _format(value, show_decimals, decimal_places) for value in set(values)}
+    return [formatted[value] for value in values]
@@ -0,0 +1,84 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import json
+import os
+import time
+from zlp_server.batchwriter import BatchWriter
+
+FLUSH_INTERVAL = 1.0
+FLUSH_LINES = 200
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 5
+
+
+# ---------------------------------------
+# MARK: WRITER
+# ---------------------------------------
+class PrintLog:
+    """Buffered, rotating log file written from a background thread.
+
+    `write()` only enqueues the entry. The writer thread appends batches to
+    the file when `flush_lines` entries are waiting or `flush_interval`
+    seconds have passed, so request handlers never touch the disk.
+
+    Rotation:
+    - "size": log.txt -> log.txt.1 ... log.txt.<backup_count> once the file
+      would grow past `max_bytes`
+    - "daily": log.txt -> log.txt.YYYY-MM-DD on the first write of a new day
+    With `json_lines` every entry is written as one JSON object per line.
+    """
+    def __init__(self, path: str, rotation: str = "size", max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT,
+                 json_lines: bool = False, flush_interval: float = FLUSH_INTERVAL, flush_lines: int = FLUSH_LINES):
+        self.path = path
+        self.rotation = rotation
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.json_lines = json_lines
+        self._writer = BatchWriter(self._flush, flush_interval, flush_lines, "print-log")
+
+    def write(self, msg: str, success: bool):
+        self._writer.put((time.time(), msg, success))
+
+    def close(self):
+        """Flush everything still queued and stop the writer thread."""
+        self._writer.close()
+
+    def _format(self, entry: tuple) -> str:
+        ts, msg, success = entry
+        if self.json_lines:
+            return json.dumps({
+                "time": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(ts)),
+                "level": "info" if success else "error",
+                "message": msg,
+            }, ensure_ascii=False)
+        return f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))} - {'Error: ' if success == False else ''}{msg}"
+
+    def _flush(self, batch: list):
+        data = "".join(self._format(entry) + "\n" for entry in batch)
+        try:
+            self._rotate(len(data.encode("utf-8")))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Failed to write log file {self.path}: {e}")
+
+    def _rotate(self, incoming: int):
+        if not os.path.exists(self.path):
+            return
+
+        if self.rotation == "daily":
+            file_day = time.strftime('%Y-%m-%d', time.localtime(os.path.getmtime(self.path)))
+            if file_day != time.strftime('%Y-%m-%d'):
+                os.replace(self.path, f"{self.path}.{file_day}")
+            return
+
+        if os.path.getsize(self.path) + incoming <= self.max_bytes:
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -0,0 +1,61 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import os
+import threading
+import time
+
+WATCH_INTERVAL = 1.0
+
+
+# ---------------------------------------
+# MARK: WATCHER
+# ---------------------------------------
+class ConfigWatcher:
+    """Calls `on_change()` in a background thread when a file changes.
+
+    Changes are detected by polling the file's modification time and size,
+    so no extra dependency is needed. If `on_change` raises (for example on
+    a config that is still being written), the change is retried on the
+    next check and the current settings stay in place.
+    """
+    def __init__(self, path: str, on_change, interval: float = WATCH_INTERVAL):
+        self.path = path
+        self._on_change = on_change
+        self.interval = interval
+        self._stamp = self._read_stamp()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="config-watcher")
+            self._thread.start()
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last successful reload."""
+        stamp = self._read_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        try:
+            self._on_change()
+        except Exception as e:
+            print(f"Config reload failed, keeping current settings: {e}")
+            return False
+        self._stamp = stamp
+        return True
+
+    def mark_current(self):
+        """Treat the file as already loaded (after an explicit reload)."""
+        self._stamp = self._read_stamp()
+
+    def _read_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
@@ -0,0 +1,123 @@
+# ---------------------------------------
+# MARK: IMPORTS
+# ---------------------------------------
+import sys
+import threading
+import time
+from zebra import Zebra
+
+try:
+    import win32print
+except ImportError:
+    win32print = None
+
+# Seconds without a job after which stored formats are sent again, since
+# the printer may have been switched off meanwhile
+IDLE_TIMEOUT = 30.0
+
+
+# ---------------------------------------
+# MARK: PRINTER
+# ---------------------------------------
+class UsbPrinter:
+    """Cached output handle for one local (USB) printer queue.
+
+    On Windows the spooler handle from OpenPrinter stays open between jobs
+    and every write is a single RAW document. Elsewhere a cached Zebra
+    object is used, which hands the bytes to `lpr -o raw`, so any CUPS raw
+    queue (or tools/fake_lpr.py) can stand in for a real printer.
+    ZPL is passed through as bytes; there is no str round trip.
+
+    Stored formats are downloaded once per handle, like on a TCP
+    connection. USB gives no signal when the printer is power cycled, so
+    they are sent again after `idle_timeout` seconds without a job and
+    after any write error.
+    """
+    def __init__(self, queue_name: str, idle_timeout: float = IDLE_TIMEOUT):
+        self.queue_name = queue_name
+        self.idle_timeout = idle_timeout
+        self._handle = None
+        self._zebra = None
+        self._loaded_formats = {}
+        self._last_send = 0.0
+        self._lock = threading.Lock()
+
+    def send(self, data: bytes, formats=()):
+        """Write the downloads the printer may lack plus data as one spooler document."""
+        with self._lock:
+            if self.idle_timeout > 0 and time.monotonic() - self._last_send > self.idle_timeout:
+                self._loaded_formats.clear()
+            for attempt in range(2):
+                missing = [(name, download) for name, download in formats if self._loaded_formats.get(name) != download]
+                try:
+                    self._output(b"".join([download for _, download in missing] + [data]))
+                    self._loaded_formats.update(missing)
+                    self._last_send = time.monotonic()
+                    return
+                except Exception:
+                    self._close()
+                    if attempt:
+                        raise
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _output(self, payload: bytes):
+        if win32print is not None and sys.platform == "win32":
+            if self._handle is None:
+                self._handle = win32print.OpenPrinter(self.queue_name)
+            win32print.StartDocPrinter(self._handle, 1, ("Label", None, "RAW"))
+            try:
+                win32print.StartPagePrinter(self._handle)
+                win32print.WritePrinter(self._handle, payload)
+                win32print.EndPagePrinter(self._handle)
+            finally:
+                win32print.EndDocPrinter(self._handle)
+        else:
+            if self._zebra is None:
+                self._zebra = Zebra(self.queue_name)
+            self._zebra.output(payload)
+
+    def _close(self):
+        if self._handle is not None:
+            try:
+                win32print.ClosePrinter(self._handle)
+            except Exception:
+                pass
+        self._handle = None
+        self._zebra = None
+        self._loaded_formats.clear()
+
+
+# ---------------------------------------
+# MARK: POOL
+# ---------------------------------------
+class UsbPrinterPool:
+    """Keeps one UsbPrinter per queue name for the server lifetime."""
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._printers = {}
+        self._lock = threading.Lock()
+
+    def get(self, queue_name: str) -> UsbPrinter:
+        with self._lock:
+            printer = self._printers.get(queue_name)
+            if printer is None:
+                printer = UsbPrinter(queue_name, idle_timeout=self.idle_timeout)
+                self._printers[queue_name] = printer
+            return printer
+
+    def close(self, queue_name: str):
+        """Close and forget the handle for one queue (removed from the config)."""
+        with self._lock:
+            printer = self._printers.pop(queue_name, None)
+        if printer is not None:
+            printer.close()
+
+    def close_all(self):
+        with self._lock:
+            printers = list(self._printers.values())
+            self._printers.clear()
+        for printer in printers:
+            printer.close()